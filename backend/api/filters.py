@@ -1,11 +1,20 @@
-from django.db.models import Q
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connections
+from django.db.models import Case, Q, When
 from django_filters import rest_framework as filters
 
-from recipes.models import Ingredient, Recipe
+from core.ingredient_index import ingredient_index
+from recipes.models import (RECIPE_SEARCH_VECTOR, SEARCH_CONFIG, Ingredient,
+                            Recipe)
 
 
 class RecipeFilter(filters.FilterSet):
-    """Фильтр для модели рецепта."""
+    """Фильтр для модели рецепта.
+
+    Поиск по названию и описанию выполняется полнотекстовым индексом
+    PostgreSQL, опечатки в названии учитываются по сходству триграмм.
+    """
 
     is_favorited = filters.BooleanFilter(
         method='get_filter_by_relationship',
@@ -17,6 +26,7 @@ class RecipeFilter(filters.FilterSet):
     )
     author = filters.NumberFilter()
     tags = filters.CharFilter(field_name='tags__slug')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
@@ -34,12 +44,30 @@ class RecipeFilter(filters.FilterSet):
             )
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(text__icontains=value)
+            )
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.alias(
+            search_vector=RECIPE_SEARCH_VECTOR,
+        ).annotate(
+            search_rank=SearchRank(RECIPE_SEARCH_VECTOR, query),
+            search_similarity=TrigramSimilarity('name', value),
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_similar=value)
+        ).order_by('-search_rank', '-search_similarity', '-pub_date')
+
 
 class IngredientFilter(filters.FilterSet):
     """Фильтр для модели Ингредиента.
 
     Даёт возможность фильра ингредиента по началу вхождения
-    и в произвольном месте.
+    и в произвольном месте. Поиск выполняется по индексу в памяти,
+    совпадения по началу названия идут первыми.
     """
 
     name = filters.CharFilter(method='filter_name')
@@ -51,8 +79,10 @@ class IngredientFilter(filters.FilterSet):
         )
 
     def filter_name(self, queryset, name, value):
-        starts_with_queryset = queryset.filter(name__startswith=value)
-        contains_queryset = queryset.filter(name__contains=value)
-
-        sorted_queryset = starts_with_queryset.union(contains_queryset)
-        return sorted_queryset
+        ids = [item['id'] for item in ingredient_index.search(value)]
+        if not ids:
+            return queryset.none()
+        ranking = Case(
+            *(When(pk=pk, then=rank) for rank, pk in enumerate(ids))
+        )
+        return queryset.filter(pk__in=ids).order_by(ranking)
@@ -0,0 +1,83 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from core.cache import get_version
+
+
+class CachedResponseMixin:
+    """Кеширует готовые ответы списка и объекта под версией данных.
+
+    Ответы хранятся в кеше в виде байтов JSON, версия пространства
+    имён служит меткой изменения данных для заголовков ETag
+    и Last-Modified и условных запросов. Ключ строится по пути
+    и параметрам из cache_query_params, остальные параметры запроса
+    на ответ не влияют и в ключ не попадают.
+    """
+
+    cache_namespace = None
+    cache_query_params = ()
+    cache_key_template = 'response:{}:{}:{}'
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_path(self, request):
+        """Путь запроса с учитываемыми параметрами по порядку имён."""
+        params = sorted(
+            (name, value)
+            for name in self.cache_query_params
+            for value in request.query_params.getlist(name)
+        )
+        return f'{request.path}?{urlencode(params)}'
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        version = get_version(self.cache_namespace)
+        path_hash = hashlib.md5(
+            self.get_cache_path(request).encode()
+        ).hexdigest()
+        etag = f'"{self.cache_namespace}-{version}-{path_hash}"'
+        last_modified = version // 1000
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            cache_key = self.cache_key_template.format(
+                self.cache_namespace, version, path_hash
+            )
+            content = cache.get(cache_key)
+            if content is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                content = renderer.render(
+                    response.data,
+                    request.accepted_media_type,
+                    self.get_renderer_context()
+                )
+                cache.set(
+                    cache_key, content, settings.RESPONSE_CACHE_TIMEOUT
+                )
+            response = HttpResponse(content, content_type=renderer.media_type)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -1,8 +1,127 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
-    """Пагинация с дополнительным параметром лимита рецептов."""
+    """Пагинация с дополнительным параметром лимита рецептов.
+
+    С параметром cursor страницы выдаются по ключу последнего объекта
+    в порядке cursor_ordering представления, без подсчёта количества
+    объектов и без смещения. Курсор несовместим с параметрами,
+    задающими собственный порядок выдачи, например с поиском.
+    """
 
     page_size_query_param = 'limit'
     recipes_limit_query_param = 'recipes_limit'
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Неверный курсор.'
+    cursor_conflicting_params = ('search',)
+
+    def get_recipes_limit(self, request):
+        """Возвращает лимит рецептов автора или None, если он не задан."""
+        try:
+            recipes_limit = int(
+                request.query_params[self.recipes_limit_query_param]
+            )
+        except (KeyError, ValueError):
+            return None
+        return max(recipes_limit, 0)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        conflicting = [
+            param for param in self.cursor_conflicting_params
+            if param in request.query_params
+        ]
+        if conflicting:
+            raise exceptions.ValidationError({
+                self.cursor_query_param: [
+                    'Курсор нельзя использовать вместе с параметрами: '
+                    + ', '.join(conflicting) + '.'
+                ]
+            })
+        return self.paginate_queryset_by_cursor(queryset, request, view)
+
+    def paginate_queryset_by_cursor(self, queryset, request, view=None):
+        """Выдаёт страницу объектов, следующих за ключом из курсора."""
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = getattr(view, 'cursor_ordering', self.cursor_ordering)
+        fields = [field.lstrip('-') for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            values = self.decode_cursor(cursor)
+            if len(values) != len(fields):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                queryset = queryset.filter(
+                    self.get_keyset_filter(ordering, values)
+                )
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(
+                [getattr(page[-1], field) for field in fields]
+            )
+        return page
+
+    def get_keyset_filter(self, ordering, values):
+        """Условие на объекты после ключа в заданном порядке."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, values):
+        """Кодирует ключ объекта, даты сохраняются с микросекундами."""
+        data = json.dumps(values, default=lambda value: value.isoformat())
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """Раскодирует ключ объекта из курсора запроса."""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,50 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class FileRenderer(BaseRenderer):
+    """Рендерер для выгрузки готового файла.
+
+    Содержимое файла формирует представление, рендерер задаёт
+    его тип и кодировку.
+    """
+
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class PDFRenderer(FileRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+class PlainTextRenderer(FileRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+
+class CSVRenderer(FileRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+EXPORT_RENDERERS = {
+    renderer.format: renderer
+    for renderer in (PDFRenderer, PlainTextRenderer, CSVRenderer, JSONRenderer)
+}
+
+
+class FirstRendererNegotiation(DefaultContentNegotiation):
+    """Всегда выбирает первый рендерер представления.
+
+    Ни заголовок Accept, ни параметр format не влияют на выбор,
+    поэтому ответы API, включая ошибки, отдаются в JSON.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
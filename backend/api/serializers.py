@@ -1,10 +1,21 @@
+from collections import OrderedDict
+
 from django.conf import settings
-from django.db.models import F
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Manager, Prefetch, prefetch_related_objects
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
 
-from api.utils import check_is_flagged
+from api.utils import (build_absolute_url, build_absolute_variant_urls,
+                       check_is_flagged, get_flag)
+from core import shopping_list
+from core.cache import get_recipe_cache_keys, invalidate_recipes
 from core.extra_fields import Base64ImageField
+from core.images import get_variant_urls
+from core.jobs import enqueue
+from core.models import Job
+from core.tasks import RECIPE_IMAGE_VARIANTS
 from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
                             Recipe, Tag)
 from users.models import Follow, User
@@ -37,7 +48,7 @@ class CustomUserSerializer(UserSerializer):
 
     def get_is_subscribed(self, obj):
         user = self.context.get('request').user
-        return check_is_flagged(Follow, 'author', user, obj)
+        return get_flag(obj, 'is_subscribed', Follow, 'author', user)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -59,11 +70,13 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Ингредиентов, связанной по первичному ключу."""
+    """Сериализатор для модели Ингредиентов, связанной по первичному ключу.
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    Существование ингредиентов проверяется сериализатором рецепта
+    одним запросом на весь список.
+    """
+
+    id = serializers.IntegerField()
 
     class Meta:
         model = IngredientRecipe
@@ -73,16 +86,79 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeAuthorSerializer(CustomUserSerializer):
+    """Сериализатор автора рецепта без отношений текущего пользователя."""
+
+    class Meta(CustomUserSerializer.Meta):
+        fields = (
+            'email',
+            'id',
+            'username',
+            'first_name',
+            'last_name',
+        )
+
+
+class RecipeSharedSerializer(serializers.ModelSerializer):
+    """Сериализатор общей для всех пользователей части рецепта.
+
+    Изображение выдаётся относительной ссылкой, полный адрес
+    достраивается при ответе на конкретный запрос.
+    """
+
+    tags = TagSerializer(many=True)
+    author = RecipeAuthorSerializer()
+    ingredients = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'id',
+            'tags',
+            'author',
+            'ingredients',
+            'name',
+            'image',
+            'image_variants',
+            'text',
+            'cooking_time',
+        )
+
+    def get_ingredients(self, obj):
+        ingredients = [
+            {
+                'amount': item.amount,
+                'id': item.ingredient_id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+            }
+            for item in obj.ingredientrecipe_set.all()
+        ]
+        return ingredients
+
+    def get_image_variants(self, obj):
+        return get_variant_urls(obj.image_variants)
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Сериализатор списка рецептов с общим обращением к кешу."""
+
+    def to_representation(self, data):
+        recipes = data.all() if isinstance(data, Manager) else data
+        return self.child.represent_many(list(recipes))
+
+
+class RecipeSerializer(RecipeSharedSerializer):
     """Сериализатор для модели Рецептов.
 
     Дополнительно обрабатывает булевое значение подписки пользователя
     на автора.
+    Общая для всех пользователей часть рецепта берётся из кеша,
+    поверх неё выставляются отношения текущего пользователя.
     """
 
-    tags = TagSerializer(many=True)
     author = CustomUserSerializer()
-    ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -97,35 +173,94 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         )
+        list_serializer_class = RecipeListSerializer
 
     def get_is_favorited(self, obj):
         user = self.context.get('request').user
-        return check_is_flagged(Favorite, 'recipe', user, obj)
+        return get_flag(obj, 'is_favorited', Favorite, 'recipe', user)
 
     def get_is_in_shopping_cart(self, obj):
         user = self.context.get('request').user
-        return check_is_flagged(Cart, 'recipe', user, obj)
+        return get_flag(obj, 'is_in_shopping_cart', Cart, 'recipe', user)
 
-    def get_ingredients(self, obj):
-        ingredients_values = obj.ingredientrecipe_set.values(
-            'ingredient_id',
-            'amount',
-            name=F('ingredient__name'),
-            measurement_unit=F('ingredient__measurement_unit')
-        )
-        ingredients = [
-            {
-                'amount': item['amount'],
-                'id': item['ingredient_id'],
-                'name': item['name'],
-                'measurement_unit': item['measurement_unit'],
+    def get_author_is_subscribed(self, obj):
+        user = self.context.get('request').user
+        is_subscribed = getattr(obj, 'author_is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        return check_is_flagged(Follow, 'author', user, obj.author_id)
+
+    def get_shared_representations(self, recipes):
+        """Метод возвращает общие части рецептов по первичному ключу.
+
+        Отсутствующие в кеше рецепты подгружаются со связями
+        одним набором запросов и сохраняются в кеш. Ответ на запись
+        собирается без кеша: фоновая задача могла изменить рецепт
+        после его сохранения, и в кеш попали бы устаревшие данные.
+        """
+        cache_keys = {}
+        if not self.context.get('bypass_cache'):
+            cache_keys = get_recipe_cache_keys(recipes)
+        cached = cache.get_many(cache_keys.values())
+        shared = {
+            recipe_id: cached[key]
+            for recipe_id, key in cache_keys.items() if key in cached
+        }
+        missing = [recipe for recipe in recipes if recipe.pk not in shared]
+        if missing:
+            prefetch_related_objects(
+                missing,
+                'tags',
+                Prefetch(
+                    'ingredientrecipe_set',
+                    queryset=IngredientRecipe.objects.select_related(
+                        'ingredient'
+                    )
+                ),
+                'author',
+            )
+            fresh = {
+                recipe.pk: RecipeSharedSerializer(recipe).data
+                for recipe in missing
             }
-            for item in ingredients_values
-        ]
-        return ingredients
+            cache.set_many(
+                {cache_keys[pk]: data for pk, data in fresh.items()
+                 if pk in cache_keys},
+                settings.RECIPE_CACHE_TIMEOUT
+            )
+            shared.update(fresh)
+        return shared
+
+    def represent_many(self, recipes):
+        """Метод собирает рецепты из общих частей и отношений пользователя."""
+        request = self.context.get('request')
+        shared = self.get_shared_representations(recipes)
+        representations = []
+        for recipe in recipes:
+            data = OrderedDict(
+                (field, shared[recipe.pk].get(field))
+                for field in self.Meta.fields
+            )
+            data['author'] = OrderedDict(
+                data['author'],
+                is_subscribed=self.get_author_is_subscribed(recipe)
+            )
+            data['is_favorited'] = self.get_is_favorited(recipe)
+            data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(recipe)
+            if request is not None:
+                data['image'] = build_absolute_url(request, data['image'])
+                data['image_variants'] = build_absolute_variant_urls(
+                    request, data['image_variants']
+                )
+            representations.append(data)
+        return representations
+
+    def to_representation(self, instance):
+        return self.represent_many([instance])[0]
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -148,87 +283,124 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'cooking_time',
         )
 
+    def validate_ingredients(self, value):
+        ingredient_ids = [item['id'] for item in value]
+        if len(ingredient_ids) != len(set(ingredient_ids)):
+            raise serializers.ValidationError(
+                'Ингредиенты в рецепте не должны повторяться.'
+            )
+        found = set(Ingredient.objects.filter(
+            pk__in=ingredient_ids
+        ).values_list('pk', flat=True))
+        missing = [pk for pk in ingredient_ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не существуют: {missing}.'
+            )
+        return value
+
     def create(self, validated_data):
         request = self.context.get('request')
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(author=request.user, **validated_data)
-        recipe.tags.set(tags)
-        for ingredient in ingredients:
-            IngredientRecipe.objects.get_or_create(
-                recipe=recipe,
-                ingredient=ingredient.get('id'),
-                amount=ingredient.get('amount')
+        with transaction.atomic():
+            recipe = Recipe.objects.create(
+                author=request.user, **validated_data
+            )
+            recipe.tags.set(tags)
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe,
+                    ingredient_id=ingredient.get('id'),
+                    amount=ingredient.get('amount')
+                )
+                for ingredient in ingredients
             )
+            self.enqueue_image_variants(recipe)
         return recipe
 
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        instance.name = validated_data.get(
-            'name', instance.name
-        )
-        instance.text = validated_data.get(
-            'text', instance.text
-        )
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time
-        )
-        instance.tags.clear()
-        instance.ingredients.clear()
-        instance.tags.set(tags)
-        for ingredient in ingredients:
-            IngredientRecipe.objects.update_or_create(
-                recipe=instance,
-                ingredient=ingredient.get('id'),
-                amount=ingredient.get('amount')
-            )
-        instance.save()
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        update_fields = [
+            field for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in update_fields:
+            setattr(instance, field, validated_data[field])
+        with transaction.atomic():
+            if update_fields:
+                instance.save(update_fields=update_fields)
+            if tags is not None:
+                instance.tags.set(tags)
+            if ingredients is not None:
+                self.update_ingredients(instance, ingredients)
+            if 'image' in update_fields:
+                self.enqueue_image_variants(instance)
         return instance
 
+    @staticmethod
+    def enqueue_image_variants(recipe):
+        """Ставит в очередь создание вариантов изображения рецепта."""
+        enqueue(
+            RECIPE_IMAGE_VARIANTS,
+            user=recipe.author,
+            recipe_id=recipe.pk,
+            image=recipe.image.name,
+        )
+
+    def update_ingredients(self, instance, ingredients):
+        """Метод приводит ингредиенты рецепта к переданному набору.
+
+        Добавляются, изменяются и удаляются только отличающиеся строки.
+        Удалённые ингредиенты убирают из списков покупок сигналы
+        post_delete. bulk_create и bulk_update сигналы не вызывают,
+        поэтому их изменения переносятся в списки покупок здесь же.
+        """
+        amounts = {
+            ingredient.get('id'): ingredient.get('amount')
+            for ingredient in ingredients
+        }
+        existing = {
+            item.ingredient_id: item
+            for item in IngredientRecipe.objects.filter(recipe=instance)
+        }
+        deltas = {}
+        created = []
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            item = existing.get(ingredient_id)
+            if item is None:
+                created.append(IngredientRecipe(
+                    recipe=instance, ingredient_id=ingredient_id, amount=amount
+                ))
+                deltas[ingredient_id] = amount
+            elif item.amount != amount:
+                deltas[ingredient_id] = amount - item.amount
+                item.amount = amount
+                changed.append(item)
+        deleted = [
+            item.pk for ingredient_id, item in existing.items()
+            if ingredient_id not in amounts
+        ]
+        if not deltas and not deleted:
+            return
+        if deleted:
+            IngredientRecipe.objects.filter(pk__in=deleted).delete()
+        if deltas:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+            IngredientRecipe.objects.bulk_create(created)
+            shopping_list.change_ingredients(instance.pk, deltas)
+            invalidate_recipes([instance.pk])
+
     def to_representation(self, instance):
         context = self.context.copy()
         context['request'] = self.context.get('request')
+        context['bypass_cache'] = True
         recipe_serializer = RecipeSerializer(instance, context=context)
         return recipe_serializer.data
 
 
-class FollowSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Подписок."""
-
-    class Meta:
-        model = Follow
-        fields = (
-            'user',
-            'author'
-        )
-
-    def validate(self, attrs):
-        user = attrs.get('user')
-        author = attrs.get('author')
-        if user == author:
-            raise serializers.ValidationError(
-                {'errors': 'Нельзя подписаться на себя самого!'}
-            )
-        return attrs
-
-
-class CartSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Списка покупок."""
-
-    class Meta:
-        model = Cart
-        fields = '__all__'
-
-
-class FavoriteSerializer(serializers.ModelSerializer):
-    """Сериализатор для модели Избранное."""
-
-    class Meta:
-        model = Favorite
-        fields = '__all__'
-
-
 class ResponseSubscribeSerializer(CustomUserSerializer):
     """Сериализатор для методов подписок.
 
@@ -237,7 +409,7 @@ class ResponseSubscribeSerializer(CustomUserSerializer):
     """
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -258,40 +430,68 @@ class ResponseSubscribeSerializer(CustomUserSerializer):
 
         recipes_limit = self.context.get('recipes_limit')
         if recipes_limit is not None:
-            recipes_limit = int(recipes_limit)
-            data['recipes'] = data['recipes'][:recipes_limit]
             data['recipes_count'] = min(recipes_limit, data['recipes_count'])
 
         return data
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes = obj.recipes.values(
+        recipes = obj.recipes.all()
+        recipes_limit = self.context.get('recipes_limit')
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+        return ResponseFavoriteSerializer(
+            recipes, many=True, context=self.context
+        ).data
+
+
+class ResponseFavoriteSerializer(serializers.ModelSerializer):
+    """Сериализатор для методов избранного."""
+
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Recipe
+        fields = (
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
 
-        for recipe in recipes:
-            if 'image' in recipe and recipe['image']:
-                image_url = request.build_absolute_uri(recipe['image'])
-                recipe['image'] = image_url.replace(
-                    request.path, settings.MEDIA_URL)
-        return recipes
+    def get_image_variants(self, obj):
+        variants = get_variant_urls(obj.image_variants)
+        request = self.context.get('request')
+        if request is None:
+            return variants
+        return build_absolute_variant_urls(request, variants)
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
 
+class RecipeBatchSerializer(serializers.Serializer):
+    """Сериализатор списка рецептов для пакетных действий."""
 
-class ResponseFavoriteSerializer(serializers.ModelSerializer):
-    """Сериализатор для методов избранного."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=settings.RECIPE_BATCH_MAX_SIZE,
+    )
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Сериализатор для вывода состояния фоновой задачи."""
 
     class Meta:
-        model = Recipe
+        model = Job
         fields = (
             'id',
             'name',
-            'image',
-            'cooking_time'
+            'status',
+            'attempts',
+            'created',
+            'started_at',
+            'finished_at',
+            'duration',
+            'result',
+            'file',
         )
+        read_only_fields = fields
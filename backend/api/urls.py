@@ -1,8 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from api.views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
+from api.views import (CustomUserViewSet, DatabaseStatsView,
+                       IngredientViewSet, JobViewSet, RecipeViewSet,
                        TagViewSet)
+from core.async_views import make_async
 
 
 router_v1 = routers.DefaultRouter()
@@ -11,9 +14,27 @@ router_v1.register(r'users', CustomUserViewSet, basename='users')
 router_v1.register(r'tags', TagViewSet, basename='tags')
 router_v1.register(r'recipes', RecipeViewSet, basename='recipes')
 router_v1.register(r'ingredients', IngredientViewSet, basename='ingredients')
+router_v1.register(r'jobs', JobViewSet, basename='jobs')
+
+# Маршруты, запросы GET и HEAD к которым в режиме ASGI выполняются
+# в пуле потоков чтения.
+ASYNC_ROUTES = {
+    'recipes-list',
+    'recipes-detail',
+    'tags-list',
+    'tags-detail',
+    'ingredients-list',
+    'ingredients-detail',
+    'users-subscriptions',
+}
+
+router_urls = router_v1.urls
+if settings.ASYNC_VIEWS:
+    router_urls = make_async(router_urls, ASYNC_ROUTES)
 
 urlpatterns = [
-    path('', include(router_v1.urls)),
+    path('metrics/db/', DatabaseStatsView.as_view(), name='metrics-db'),
+    path('', include(router_urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,3 +1,6 @@
+from django.db.models import Exists, OuterRef
+
+
 def check_is_flagged(model, relation_parameter, user, obj):
     """Метод проверяет выбранное отношение между пользователем и объектом."""
     parameters = {
@@ -6,3 +9,50 @@ def check_is_flagged(model, relation_parameter, user, obj):
     }
     return user.is_authenticated and model.objects.filter(
         **parameters).exists()
+
+
+def get_flag(obj, annotation, model, relation_parameter, user):
+    """Метод берёт отношение из аннотации объекта.
+
+    Если объект получен не из аннотированного queryset,
+    отношение проверяется отдельным запросом.
+    """
+    flag = getattr(obj, annotation, None)
+    if flag is not None:
+        return flag
+    return check_is_flagged(model, relation_parameter, user, obj)
+
+
+def annotate_flags(queryset, user, **flags):
+    """Метод аннотирует queryset отношениями пользователя с объектами.
+
+    Каждое отношение задаётся моделью и полем связи с объектом,
+    третьим элементом можно указать поле объекта вместо первичного ключа.
+    Для анонимного пользователя queryset возвращается без изменений.
+    """
+    if not user.is_authenticated:
+        return queryset
+    annotations = {}
+    for annotation, (model, relation_parameter, *outer_field) in flags.items():
+        outer_ref = OuterRef(outer_field[0] if outer_field else 'pk')
+        annotations[annotation] = Exists(model.objects.filter(
+            user=user, **{relation_parameter: outer_ref}
+        ))
+    return queryset.annotate(**annotations)
+
+
+def build_absolute_url(request, url):
+    """Метод достраивает относительную ссылку до полного адреса."""
+    return request.build_absolute_uri(url) if url else url
+
+
+def build_absolute_variant_urls(request, variants):
+    """Метод достраивает ссылки на варианты изображения."""
+    return {
+        variant: {
+            key: build_absolute_url(request, value)
+            if isinstance(value, str) else value
+            for key, value in data.items()
+        }
+        for variant, data in variants.items()
+    }
@@ -1,24 +1,39 @@
-import tempfile
+import os
 
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.http import urlquote
 from django_filters import rest_framework as filters
 from djoser.conf import settings
 from djoser.views import UserViewSet
-from rest_framework import permissions, viewsets
+from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
 
 from api.filters import IngredientFilter, RecipeFilter
+from api.mixins import CachedResponseMixin
 from api.permissions import IsOwnerOrStaffOrReadOnly
-from api.serializers import (CartSerializer, CustomUserSerializer,
-                             FavoriteSerializer, FollowSerializer,
-                             IngredientSerializer, RecipeCreateSerializer,
-                             RecipeSerializer, ResponseFavoriteSerializer,
+from api.renderers import EXPORT_RENDERERS, FirstRendererNegotiation
+from api.serializers import (CustomUserSerializer, IngredientSerializer,
+                             JobSerializer, RecipeBatchSerializer,
+                             RecipeCreateSerializer, RecipeSerializer,
+                             ResponseFavoriteSerializer,
                              ResponseSubscribeSerializer, TagSerializer)
-from core.action_method import save_delete_action
+from api.utils import annotate_flags
+from core.action_method import change_relations, save_delete_action
+from core.cache import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE
 from core.creation_pdf import make_shopping_cart
+from core.db.metrics import get_connection_stats
+from core.ingredient_index import ingredient_index
+from core.jobs import enqueue
+from core.models import Job
+from core.shopping_list_export import EXPORTERS
+from core.tasks import SHOPPING_CART_PDF
 from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
 from users.models import Follow, User
 
@@ -32,6 +47,15 @@ class CustomUserViewSet(UserViewSet):
 
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
+    cursor_ordering = ('id',)
+
+    def get_queryset(self):
+        """Добавляет к пользователям признак подписки текущего пользователя."""
+        return annotate_flags(
+            super().get_queryset(),
+            self.request.user,
+            is_subscribed=(Follow, 'author')
+        )
 
     def get_permissions(self):
         """Выдаёт разрешение на вывод данных рецепта по ключу."""
@@ -46,20 +70,17 @@ class CustomUserViewSet(UserViewSet):
             url_name='subscribe')
     def subscribe(self, request, id):
         """Метод подписки пользователя на автора."""
-        user = request.user
-        author = get_object_or_404(User, pk=id)
-        user_author = Follow.objects.filter(user=user, author=author)
-        data_to_response = {
-            'user': user.id,
-            'author': author.id
-        }
+        if request.method == 'POST' and str(request.user.pk) == str(id):
+            raise ValidationError(
+                {'errors': ['Нельзя подписаться на себя самого!']}
+            )
         return save_delete_action(
             request=request,
-            objects=user_author,
-            target=author,
-            serializer_class=FollowSerializer,
-            response_serializer_class=ResponseSubscribeSerializer,
-            data=data_to_response)
+            model=Follow,
+            queryset=User.objects.all(),
+            pk=id,
+            target_field='author',
+            response_serializer_class=ResponseSubscribeSerializer)
 
     @action(methods=['GET'],
             detail=False,
@@ -67,38 +88,56 @@ class CustomUserViewSet(UserViewSet):
             url_path='subscriptions',
             url_name='subscriptions')
     def subscriptions(self, request):
-        """Метод вывода текущих подписок пользователя."""
-        queryset = User.objects.filter(following__user=request.user)
-        data = self.paginate_queryset(queryset=queryset)
-        recipes_limit = request.query_params.get(
-            self.paginator.recipes_limit_query_param
-        )
+        """Метод вывода текущих подписок пользователя.
+
+        Количество рецептов автора хранится в его счётчике,
+        лимит рецептов применяется в базе данных подзапросом по автору.
+        Авторы упорядочены по ключу, как и при листании по курсору.
+        """
+        recipes_limit = self.paginator.get_recipes_limit(request)
+        recipes = Recipe.objects.all()
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).order_by('-pub_date', '-id').values('pk')[:recipes_limit]
+            ))
+        queryset = annotate_flags(
+            User.objects.filter(following__user=request.user),
+            request.user,
+            is_subscribed=(Follow, 'author')
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes)
+        ).order_by('id')
+        page = self.paginate_queryset(queryset=queryset)
         serializer = ResponseSubscribeSerializer(
+            page,
             many=True,
-            data=data,
             context={'request': request, 'recipes_limit': recipes_limit})
-        serializer.is_valid()
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """Взаимодействие с тегами.
 
     Viewset позволяет выводить список тегов.
     Доступна возможность просмотра тега по ключу.
+    Ответы кешируются до изменения тегов.
     """
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    cache_namespace = TAGS_NAMESPACE
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """Взаимодействие с ингредиентами.
 
     Viewset позволяет выводить список ингредиентов.
     Доступна возможность просмотра ингредиента по ключу,
     поиска ингредиента по входному значению.
+    Ответы кешируются до изменения ингредиентов.
     """
 
     queryset = Ingredient.objects.all()
@@ -106,6 +145,23 @@ class IngredientViewSet(viewsets.ModelViewSet):
     pagination_class = None
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = IngredientFilter
+    cache_namespace = INGREDIENTS_NAMESPACE
+    search_query_param = 'name'
+    search_limit_query_param = 'limit'
+    cache_query_params = (search_query_param, search_limit_query_param)
+
+    def list(self, request, *args, **kwargs):
+        """Отвечает на поиск по названию из индекса в памяти."""
+        value = request.query_params.get(self.search_query_param)
+        if not value:
+            return super().list(request, *args, **kwargs)
+        try:
+            limit = max(
+                int(request.query_params[self.search_limit_query_param]), 0
+            )
+        except (KeyError, ValueError):
+            limit = None
+        return Response(ingredient_index.search(value, limit))
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -116,12 +172,28 @@ class RecipeViewSet(viewsets.ModelViewSet):
     Для авторизированных доступная возможность добавить
     рецепт в избранное, добавить рецепт в список покупок,
     скачать имеющийся список покупок.
+    Список рецептов можно листать по курсору в порядке публикации.
     """
 
     queryset = Recipe.objects.all()
+    cursor_ordering = ('-pub_date', '-id')
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        """Аннотирует рецепты отношениями текущего пользователя.
+
+        Общая часть рецептов берётся сериализатором из кеша,
+        поэтому связи подгружаются только для отсутствующих в нём.
+        """
+        return annotate_flags(
+            super().get_queryset(),
+            self.request.user,
+            is_favorited=(Favorite, 'recipe'),
+            is_in_shopping_cart=(Cart, 'recipe'),
+            author_is_subscribed=(Follow, 'author', 'author'),
+        )
+
     def get_permissions(self):
         """Выдаёт разрешение на редактирование рецепта."""
         method = self.request.method
@@ -149,20 +221,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
             url_name='favorite')
     def favorite(self, request, pk):
         """Метод для добавления рецепта в избранное."""
-        user = request.user
-        recipe = get_object_or_404(Recipe, pk=pk)
-        user_recipe = Favorite.objects.filter(user=user, recipe=recipe)
-        data_to_response = {
-            'user': user.id,
-            'recipe': recipe.id
-        }
         return save_delete_action(
             request=request,
-            objects=user_recipe,
-            target=recipe,
-            serializer_class=FavoriteSerializer,
-            response_serializer_class=ResponseFavoriteSerializer,
-            data=data_to_response)
+            model=Favorite,
+            queryset=Recipe.objects.all(),
+            pk=pk,
+            target_field='recipe',
+            response_serializer_class=ResponseFavoriteSerializer)
 
     @action(methods=['POST', 'DELETE'],
             detail=True,
@@ -171,36 +236,127 @@ class RecipeViewSet(viewsets.ModelViewSet):
             url_name='shopping_cart')
     def shopping_cart(self, request, pk):
         """Метод для добавления рецепта в список покупок."""
-        user = request.user
-        recipe = get_object_or_404(Recipe, pk=pk)
-        user_recipe = Cart.objects.filter(user=user, recipe=recipe)
-        data_to_response = {
-            'user': user.id,
-            'recipe': recipe.id
-        }
         return save_delete_action(
             request=request,
-            objects=user_recipe,
-            target=recipe,
-            serializer_class=CartSerializer,
-            response_serializer_class=ResponseFavoriteSerializer,
-            data=data_to_response)
+            model=Cart,
+            queryset=Recipe.objects.all(),
+            pk=pk,
+            target_field='recipe',
+            response_serializer_class=ResponseFavoriteSerializer)
+
+    def batch_action(self, request, model):
+        """Общий метод пакетного добавления и удаления рецептов.
+
+        Возвращает итог для каждого переданного рецепта.
+        """
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = change_relations(
+            request=request,
+            model=model,
+            queryset=Recipe.objects.all(),
+            target_ids=serializer.validated_data['recipes'],
+            target_field='recipe')
+        return Response({'results': results})
+
+    @action(methods=['POST', 'DELETE'],
+            detail=False,
+            permission_classes=(permissions.IsAuthenticated,),
+            url_path='favorite/batch',
+            url_name='favorite_batch')
+    def favorite_batch(self, request):
+        """Метод для добавления нескольких рецептов в избранное."""
+        return self.batch_action(request, Favorite)
+
+    @action(methods=['POST', 'DELETE'],
+            detail=False,
+            permission_classes=(permissions.IsAuthenticated,),
+            url_path='shopping_cart/batch',
+            url_name='shopping_cart_batch')
+    def shopping_cart_batch(self, request):
+        """Метод для добавления нескольких рецептов в список покупок."""
+        return self.batch_action(request, Cart)
 
     @action(methods=['GET'],
             detail=False,
             permission_classes=(permissions.IsAuthenticated,),
+            renderer_classes=(JSONRenderer,),
+            content_negotiation_class=FirstRendererNegotiation,
             url_path='download_shopping_cart',
             url_name='download_shopping_cart')
     def download_shopping_cart(self, request):
-        """Метод для загрузки списка покупок в PDF формате."""
-        with tempfile.NamedTemporaryFile(delete=False) as temp_pdf_file:
-            temp_filename = temp_pdf_file.name
+        """Метод для загрузки списка покупок.
 
-        make_shopping_cart(request.user, temp_filename)
-
-        with open(temp_filename, 'rb') as pdf_file:
-            pdf_content = pdf_file.read()
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        filename = urlquote(f'shopping_list_{request.user}.pdf')
+        По умолчанию список отдаётся в PDF формате, параметр format
+        позволяет получить потоковую выгрузку в форматах txt, csv и json.
+        С параметром background PDF формируется фоновой задачей,
+        в ответе возвращается задача для отслеживания результата.
+        Формат выбирается только по параметру format, ошибки
+        отдаются в JSON.
+        """
+        export_format = request.query_params.get('format', 'pdf')
+        renderer = EXPORT_RENDERERS.get(export_format)
+        if renderer is None:
+            raise ValidationError({'format': [
+                f'Неизвестный формат: {export_format}. Доступны: '
+                f'{", ".join(EXPORT_RENDERERS)}.'
+            ]})
+        if renderer.format == 'pdf' and request.query_params.get(
+            'background'
+        ) in ('1', 'true'):
+            job = enqueue(SHOPPING_CART_PDF, user=request.user)
+            return Response(
+                JobSerializer(job, context={'request': request}).data,
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Location': reverse(
+                    'jobs-detail', args=(job.pk,), request=request
+                )}
+            )
+        filename = urlquote(
+            f'shopping_list_{request.user}.{renderer.format}'
+        )
+        if renderer.format == 'pdf':
+            response = HttpResponse(
+                make_shopping_cart(request.user),
+                content_type=renderer.media_type
+            )
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = StreamingHttpResponse(
+                EXPORTERS[renderer.format](request.user),
+                content_type=content_type
+            )
         response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Взаимодействие с фоновыми задачами.
+
+    Viewset позволяет пользователю узнать состояние своей задачи
+    и получить её результат.
+    """
+
+    serializer_class = JobSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+
+class DatabaseStatsView(APIView):
+    """Счётчики соединений с базой данных.
+
+    Счётчики ведутся в каждом процессе отдельно, ответ содержит данные
+    процесса, обработавшего запрос.
+    """
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return Response({
+            'pid': os.getpid(),
+            'databases': get_connection_stats(),
+        })
@@ -1,47 +1,176 @@
-from core.exceptions import ObjectExistsError, ObjectNotFoundError
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 
+from core import shopping_list
+from core.counters import change_counters
+from core.exceptions import ObjectExistsError, ObjectNotFoundError
+from recipes.models import Cart, Favorite
+from users.models import Follow
 
-def check_objects(method, objects):
-    """Метод для проверки соответствия метода и действия с объектами."""
-    if not objects.exists() and method == 'DELETE':
-        raise ObjectNotFoundError('Объект не найден.')
-    elif objects.exists() and method == 'POST':
-        raise ObjectExistsError('Объект уже существует.')
 
+INSERT_SQL = '''
+    INSERT INTO {table} ({user}, {target})
+    SELECT %s, {target_pk} FROM {target_table}
+    WHERE {target_pk} IN ({values})
+    ON CONFLICT DO NOTHING
+    RETURNING {target}
+'''
+DELETE_SQL = '''
+    DELETE FROM {table}
+    WHERE {user} = %s AND {target} IN ({values})
+    RETURNING {target}
+'''
 
-def save_objects(request, target,
-                 serializer_class, response_serializer_class, data):
-    """Метод для сохранения отношений субъекта и объекта."""
-    serializer = serializer_class(data=data)
-    serializer.is_valid(raise_exception=True)
-    serializer.save()
-    serializer = response_serializer_class(
-        target, context={'request': request}
+
+def favorites_changed(user_id, recipe_ids, delta):
+    change_counters('favorites', recipe_ids, delta)
+
+
+def cart_changed(user_id, recipe_ids, delta):
+    if delta > 0:
+        shopping_list.add_recipes(user_id, recipe_ids)
+    else:
+        shopping_list.remove_recipes(user_id, recipe_ids)
+
+
+def follows_changed(user_id, author_ids, delta):
+    change_counters('followers', author_ids, delta)
+
+
+# Сырые INSERT и DELETE не отправляют сигналы моделей, поэтому
+# зависящие от связей данные обновляются этими функциями.
+RELATIONS_CHANGED = {
+    Favorite: favorites_changed,
+    Cart: cart_changed,
+    Follow: follows_changed,
+}
+
+
+def execute_relations_sql(sql, model, target_field, user_id, target_ids):
+    """Выполняет запрос к связям и возвращает ключи затронутых объектов."""
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    target = model._meta.get_field(target_field)
+    target_model = target.related_model
+    sql = sql.format(
+        table=quote(model._meta.db_table),
+        user=quote(model._meta.get_field('user').column),
+        target=quote(target.column),
+        target_table=quote(target_model._meta.db_table),
+        target_pk=quote(target_model._meta.pk.column),
+        values=', '.join(['%s'] * len(target_ids)),
     )
-    return Response(serializer.data, status=status.HTTP_201_CREATED)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (user_id, *target_ids))
+        return {row[0] for row in cursor.fetchall()}
+
+
+def add_relations(model, target_field, user_id, target_ids):
+    """Добавляет связи пользователя с объектами одним INSERT.
+
+    Конфликтующие связи пропускаются через ON CONFLICT DO NOTHING,
+    отсутствующие объекты отсеиваются в том же запросе. Возвращает
+    ключи объектов, связи с которыми добавлены.
+    """
+    if not target_ids:
+        return set()
+    with transaction.atomic(using=router.db_for_write(model)):
+        added = execute_relations_sql(
+            INSERT_SQL, model, target_field, user_id, target_ids
+        )
+        if added:
+            RELATIONS_CHANGED[model](user_id, added, 1)
+    return added
+
+
+def remove_relations(model, target_field, user_id, target_ids):
+    """Удаляет связи пользователя с объектами одним DELETE.
+
+    Возвращает ключи объектов, связи с которыми были удалены.
+    """
+    if not target_ids:
+        return set()
+    with transaction.atomic(using=router.db_for_write(model)):
+        removed = execute_relations_sql(
+            DELETE_SQL, model, target_field, user_id, target_ids
+        )
+        if removed:
+            RELATIONS_CHANGED[model](user_id, removed, -1)
+    return removed
 
 
-def save_delete_action(request, objects, target,
-                       serializer_class, response_serializer_class, data):
+def change_relation(request, model, queryset, pk, target_field):
+    """Добавляет или удаляет связь пользователя с объектом.
+
+    Повторная связь и удаление отсутствующей связи определяются
+    по результату самого запроса, без предварительных проверок.
+    Объект загружается только для ответа и при неудаче.
+    """
+    try:
+        pk = queryset.model._meta.pk.to_python(pk)
+    except ValidationError:
+        raise Http404
+    if request.method == 'POST':
+        if add_relations(model, target_field, request.user.pk, [pk]):
+            return get_object_or_404(queryset, pk=pk)
+        get_object_or_404(queryset, pk=pk)
+        raise ObjectExistsError('Объект уже существует.')
+    if not remove_relations(model, target_field, request.user.pk, [pk]):
+        get_object_or_404(queryset, pk=pk)
+        raise ObjectNotFoundError('Объект не найден.')
+    return None
+
+
+def change_relations(request, model, queryset, target_ids, target_field):
+    """Добавляет или удаляет связи пользователя с несколькими объектами.
+
+    Все изменения выполняются в одной транзакции, для каждого
+    ключа возвращается итог: для POST added, exists или not_found,
+    для DELETE removed, absent или not_found.
+    """
+    target_ids = list(dict.fromkeys(target_ids))
+    if request.method == 'POST':
+        change, done, skipped = add_relations, 'added', 'exists'
+    else:
+        change, done, skipped = remove_relations, 'removed', 'absent'
+    with transaction.atomic(using=router.db_for_write(model)):
+        changed = change(model, target_field, request.user.pk, target_ids)
+        rest = [pk for pk in target_ids if pk not in changed]
+        existing = set(queryset.filter(pk__in=rest).values_list(
+            'pk', flat=True
+        )) if rest else set()
+    return [
+        {
+            'id': pk,
+            'status': (
+                done if pk in changed
+                else skipped if pk in existing
+                else 'not_found'
+            ),
+        }
+        for pk in target_ids
+    ]
+
+
+def save_delete_action(request, model, queryset, pk, target_field,
+                       response_serializer_class):
     """Главный метод в декораторе action."""
-    method = request.method
     try:
-        check_objects(method=method, objects=objects)
+        target = change_relation(request, model, queryset, pk, target_field)
     except (ObjectExistsError, ObjectNotFoundError) as error:
         return Response(
             {
                 'error': str(error)
             }, status=status.HTTP_400_BAD_REQUEST
         )
-    if method == 'POST':
-        return save_objects(
-            request=request,
-            target=target,
-            serializer_class=serializer_class,
-            response_serializer_class=response_serializer_class,
-            data=data
-        )
-    objects.delete()
-    return Response(status=status.HTTP_204_NO_CONTENT)
+    if target is None:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    serializer = response_serializer_class(
+        target, context={'request': request}
+    )
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
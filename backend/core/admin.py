@@ -0,0 +1,31 @@
+from django.contrib import admin
+
+from core.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Админ панель для модели Фоновых задач."""
+
+    list_display = (
+        'pk',
+        'name',
+        'user',
+        'status',
+        'attempts',
+        'created',
+        'finished_at',
+        'duration',
+    )
+    list_filter = (
+        'status',
+        'name',
+    )
+    list_select_related = ('user',)
+    readonly_fields = (
+        'created',
+        'started_at',
+        'finished_at',
+        'duration',
+    )
+    empty_value_display = '-пусто-'
@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+
+READ_METHODS = ('GET', 'HEAD')
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Пул потоков процесса для синхронных представлений.
+
+    Размер пула ограничивает число одновременных запросов к базе
+    данных и, как следствие, число соединений процесса.
+    """
+    global executor
+    if executor is None:
+        with executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_VIEW_THREADS,
+                    thread_name_prefix='view',
+                )
+    return executor
+
+
+def run_view(view, request, args, kwargs):
+    """Выполняет представление в потоке пула как отдельный запрос.
+
+    Соединения потока с базой проверяются до и после запроса так же,
+    как это делают сигналы начала и конца запроса для WSGI. Ответ
+    отрисовывается здесь же, чтобы не занимать основной поток.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Асинхронная обёртка синхронного представления.
+
+    Цикл событий не блокируется на время запросов к базе и отрисовки,
+    запросы GET и HEAD выполняются в ограниченном пуле потоков
+    с копией контекста запроса. Запросы на запись идут обычным для
+    синхронных представлений путём Django и пул чтения не занимают.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(view, thread_sensitive=True)(
+                request, *args, **kwargs
+            )
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            get_executor(), context.run, run_view, view, request, args,
+            kwargs
+        )
+    return wrapper
+
+
+def make_async(urlpatterns, names):
+    """Заменяет представления маршрутов с заданными именами на async."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_view(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        ) if pattern.name in names else pattern
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,79 @@
+import time
+
+from django.core.cache import caches
+from django.db.models import F, QuerySet
+from django.utils.connection import ConnectionProxy
+
+from recipes.models import Recipe
+
+
+VERSION_KEY_TEMPLATE = 'version:{}'
+INGREDIENTS_NAMESPACE = 'ingredients'
+TAGS_NAMESPACE = 'tags'
+RECIPE_KEY_TEMPLATE = 'recipe:v3:{}:{}:{}:{}'
+
+version_cache = ConnectionProxy(caches, 'versions')
+# Версии, увеличенные этим процессом, — их видно без чтения кеша.
+bumped_versions = {}
+
+
+def make_version():
+    """Новая версия данных — отметка времени в миллисекундах."""
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    """Возвращает текущую версию данных пространства имён.
+
+    Версия хранится в отдельном общем кеше без вытеснения, поэтому
+    её изменение видно всем процессам приложения. Если версия всё же
+    пропала, создаётся новая по текущему времени: она больше всех
+    прежних, и старые записи кеша не могут оказаться снова актуальными.
+    """
+    key = VERSION_KEY_TEMPLATE.format(namespace)
+    version = version_cache.get(key)
+    if version is None:
+        version_cache.add(key, make_version(), timeout=None)
+        version = version_cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Увеличивает версию данных пространства имён."""
+    key = VERSION_KEY_TEMPLATE.format(namespace)
+    version = max(make_version(), (version_cache.get(key) or 0) + 1)
+    version_cache.set(key, version, timeout=None)
+    bumped_versions[namespace] = version
+    return version
+
+
+def get_recipe_cache_keys(recipes):
+    """Ключи кеша общей части рецептов по первичному ключу.
+
+    В ключ входят версия рецепта и версии тегов и ингредиентов,
+    поэтому изменение рецепта или каталога делает недействительными
+    его закешированные данные.
+    """
+    tags_version = get_version(TAGS_NAMESPACE)
+    ingredients_version = get_version(INGREDIENTS_NAMESPACE)
+    return {
+        recipe.pk: RECIPE_KEY_TEMPLATE.format(
+            recipe.pk, recipe.version, tags_version, ingredients_version
+        )
+        for recipe in recipes
+    }
+
+
+def invalidate_recipes(recipe_ids):
+    """Увеличивает версии рецептов в текущей транзакции.
+
+    Версия меняется вместе с данными рецепта, поэтому запрос,
+    прочитавший рецепт до фиксации, сохранит его под прежним ключом,
+    который больше никто не запрашивает. Такие записи удаляются
+    из кеша по истечении RECIPE_CACHE_TIMEOUT.
+    """
+    if not isinstance(recipe_ids, QuerySet):
+        recipe_ids = set(recipe_ids)
+        if not recipe_ids:
+            return
+    Recipe.objects.filter(pk__in=recipe_ids).update(version=F('version') + 1)
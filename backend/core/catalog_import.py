@@ -0,0 +1,223 @@
+import csv
+import io
+import json
+from collections import Counter, namedtuple
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+
+from core.recipe_dataset import batches
+from recipes.models import Ingredient, Tag
+
+
+Catalog = namedtuple('Catalog', ('model', 'fields', 'key', 'unique'))
+
+CATALOGS = {
+    'ingredients': Catalog(
+        Ingredient, ('name', 'measurement_unit'), 'name', ()
+    ),
+    'tags': Catalog(Tag, ('name', 'color', 'slug'), 'slug', ('name', 'color')),
+}
+STAGING_SQL = '''
+    CREATE TEMPORARY TABLE {staging} ({definitions}) ON COMMIT DROP
+'''
+COPY_SQL = 'COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)'
+CONFLICTS_SQL = '''
+    DELETE FROM {staging} AS staging USING {table} AS target
+    WHERE target.{key} <> staging.{key} AND ({conditions})
+'''
+UPSERT_SQL = '''
+    WITH upserted AS (
+        INSERT INTO {table} ({columns})
+        SELECT {columns} FROM {staging}
+        ON CONFLICT ({key}) DO UPDATE SET {assignments}
+        WHERE ({current}) IS DISTINCT FROM ({excluded})
+        RETURNING xmax = 0 AS inserted
+    )
+    SELECT COUNT(*) FILTER (WHERE inserted),
+           COUNT(*) FILTER (WHERE NOT inserted)
+    FROM upserted
+'''
+
+
+def read_rows(path, fields):
+    """Перебирает строки файла каталога с их номерами.
+
+    CSV читается по позициям полей, строка с названиями полей
+    пропускается; JSON должен содержать массив объектов.
+    """
+    path = Path(path)
+    with open(path, encoding='utf-8') as file:
+        if path.suffix == '.json':
+            for number, item in enumerate(json.load(file), start=1):
+                yield number, item
+            return
+        for number, row in enumerate(csv.reader(file), start=1):
+            if tuple(row) == fields:
+                continue
+            if len(row) != len(fields):
+                yield number, None
+                continue
+            yield number, dict(zip(fields, row))
+
+
+def clean_rows(catalog, rows, errors):
+    """Проверяет строки каталога полями модели.
+
+    Неверные строки и повторы уникальных значений пропускаются,
+    описание каждой пропущенной строки передаётся в errors.
+    """
+    model_fields = [
+        catalog.model._meta.get_field(name) for name in catalog.fields
+    ]
+    seen = {name: set() for name in (catalog.key, *catalog.unique)}
+    for number, item in rows:
+        if not isinstance(item, dict):
+            errors(number, 'неверное количество полей')
+            continue
+        try:
+            row = {
+                field.name: field.clean(str(item.get(field.name) or ''), None)
+                for field in model_fields
+            }
+        except ValidationError as error:
+            errors(number, '; '.join(error.messages))
+            continue
+        repeated = [name for name in seen if row[name] in seen[name]]
+        if repeated:
+            errors(number, f'повтор значения поля {repeated[0]}')
+            continue
+        for name in seen:
+            seen[name].add(row[name])
+        yield tuple(row[name] for name in catalog.fields)
+
+
+def upsert_postgresql(connection, catalog, row_batches, progress):
+    """Загружает строки через COPY во временную таблицу и сливает их.
+
+    Вставка и обновление выполняются одним INSERT ... ON CONFLICT,
+    строки, конфликтующие с другими записями по уникальным полям,
+    пропускаются.
+    """
+    table = catalog.model._meta.db_table
+    staging = f'staging_{table}'
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(name) for name in catalog.fields)
+    values = [name for name in catalog.fields if name != catalog.key]
+    counts = Counter()
+    with connection.cursor() as cursor:
+        cursor.execute(STAGING_SQL.format(
+            staging=staging,
+            definitions=', '.join(f'{quote(name)} text'
+                                  for name in catalog.fields)
+        ))
+        for batch in row_batches:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor.copy_expert(
+                COPY_SQL.format(staging=staging, columns=columns), buffer
+            )
+            counts['staged'] += len(batch)
+            progress(counts['staged'])
+        if catalog.unique:
+            cursor.execute(CONFLICTS_SQL.format(
+                staging=staging,
+                table=quote(table),
+                key=quote(catalog.key),
+                conditions=' OR '.join(
+                    f'target.{quote(name)} = staging.{quote(name)}'
+                    for name in catalog.unique
+                )
+            ))
+            counts['conflicts'] = cursor.rowcount
+        cursor.execute(UPSERT_SQL.format(
+            table=quote(table),
+            staging=staging,
+            columns=columns,
+            key=quote(catalog.key),
+            assignments=', '.join(
+                f'{quote(name)} = excluded.{quote(name)}' for name in values
+            ),
+            current=', '.join(f'{quote(table)}.{quote(name)}'
+                              for name in values),
+            excluded=', '.join(f'excluded.{quote(name)}' for name in values),
+        ))
+        counts['inserted'], counts['updated'] = cursor.fetchone()
+    return counts
+
+
+def upsert_orm(connection, catalog, row_batches, progress):
+    """Загружает строки пачками средствами ORM для других баз данных."""
+    manager = catalog.model.objects.using(connection.alias)
+    values = [name for name in catalog.fields if name != catalog.key]
+    counts = Counter()
+    for batch in row_batches:
+        rows = [dict(zip(catalog.fields, row)) for row in batch]
+        existing = manager.in_bulk(
+            [row[catalog.key] for row in rows], field_name=catalog.key
+        )
+        owners = {
+            name: dict(manager.filter(**{
+                f'{name}__in': [row[name] for row in rows]
+            }).values_list(name, catalog.key))
+            for name in catalog.unique
+        }
+        created = []
+        changed = []
+        for row in rows:
+            key = row[catalog.key]
+            if any(owners[name].get(row[name], key) != key
+                   for name in catalog.unique):
+                counts['conflicts'] += 1
+                continue
+            obj = existing.get(key)
+            if obj is None:
+                created.append(catalog.model(**row))
+            elif any(getattr(obj, name) != row[name] for name in values):
+                for name in values:
+                    setattr(obj, name, row[name])
+                changed.append(obj)
+        manager.bulk_create(created)
+        manager.bulk_update(changed, values)
+        counts['inserted'] += len(created)
+        counts['updated'] += len(changed)
+        counts['staged'] += len(batch)
+        progress(counts['staged'])
+    return counts
+
+
+def load_catalog(catalog, path, batch_size, progress, errors):
+    """Загружает файл каталога в одной транзакции.
+
+    Возвращает количество прочитанных, вставленных, обновлённых,
+    неизменённых и пропущенных строк.
+    """
+    using = router.db_for_write(catalog.model)
+    connection = connections[using]
+    upsert = (
+        upsert_postgresql if connection.vendor == 'postgresql'
+        else upsert_orm
+    )
+    skipped = Counter()
+
+    def skip(number, message):
+        skipped['invalid'] += 1
+        errors(number, message)
+
+    rows = clean_rows(catalog, read_rows(path, catalog.fields), skip)
+    with transaction.atomic(using=using):
+        counts = upsert(
+            connection, catalog, batches(rows, batch_size), progress
+        )
+    return {
+        'read': counts['staged'] + skipped['invalid'],
+        'inserted': counts['inserted'],
+        'updated': counts['updated'],
+        'unchanged': (
+            counts['staged'] - counts['conflicts']
+            - counts['inserted'] - counts['updated']
+        ),
+        'skipped': skipped['invalid'] + counts['conflicts'],
+    }
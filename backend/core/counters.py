@@ -0,0 +1,83 @@
+from collections import namedtuple
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorite, Recipe
+from users.models import Follow, User
+
+
+Counter = namedtuple(
+    'Counter', ('model', 'field', 'related_model', 'related_field')
+)
+
+COUNTERS = {
+    'favorites': Counter(Recipe, 'favorites_count', Favorite, 'recipe'),
+    'recipes': Counter(User, 'recipes_count', Recipe, 'author'),
+    'followers': Counter(User, 'followers_count', Follow, 'author'),
+}
+
+
+def change_counters(name, pks, delta):
+    """Атомарно изменяет счётчик строк на delta одним UPDATE.
+
+    Счётчик не опускается ниже нуля, даже если успел разойтись
+    с данными; такие расхождения исправляет recountcounters.
+    """
+    counter = COUNTERS[name]
+    value = F(counter.field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    counter.model.objects.filter(pk__in=pks).update(**{counter.field: value})
+
+
+def change_counter(name, pk, delta):
+    """Изменяет счётчик одной строки на delta."""
+    change_counters(name, [pk], delta)
+
+
+def get_actual_count(counter):
+    """Подзапрос с количеством связанных строк для счётчика."""
+    return Coalesce(Subquery(
+        counter.related_model.objects.filter(
+            **{counter.related_field: OuterRef('pk')}
+        ).order_by().values(counter.related_field).annotate(
+            count=Count('pk')
+        ).values('count')
+    ), 0)
+
+
+def get_chunks(name, size):
+    """Диапазоны первичных ключей для пересчёта счётчика частями."""
+    model = COUNTERS[name].model
+    pks = model.objects.order_by('pk').values_list('pk', flat=True)
+    first, last = pks.first(), pks.last()
+    if first is None:
+        return []
+    return [
+        (name, start, min(start + size - 1, last))
+        for start in range(first, last + 1, size)
+    ]
+
+
+def recount(name, **lookups):
+    """Пересчитывает счётчик у строк, отобранных по условиям.
+
+    Обновляются только разошедшиеся строки, возвращается
+    их количество.
+    """
+    counter = COUNTERS[name]
+    actual = get_actual_count(counter)
+    return counter.model.objects.filter(
+        **lookups
+    ).alias(
+        actual=actual
+    ).exclude(
+        **{counter.field: F('actual')}
+    ).update(**{counter.field: actual})
+
+
+def recount_chunk(chunk):
+    """Пересчитывает счётчик в диапазоне первичных ключей."""
+    name, first, last = chunk
+    return recount(name, pk__range=(first, last))
@@ -1,68 +1,101 @@
-from collections import defaultdict
+import hashlib
+import json
+from pathlib import Path
 
-from django.db.models import Sum
-from fpdf import FPDF
-from recipes.models import IngredientRecipe
+from django.conf import settings
+from django.core.cache import cache
+from fpdf import FPDF, set_global
+
+from core.shopping_list import iter_ingredients
 
 
 INGREDIENT_WIDTH = 100
 MEASUREMENT_WIDTH = 30
 AMOUNT_WIDTH = 30
-FONT_PATH = '/app/core/fonts/NotoSans-Regular.ttf'
+FONT_FAMILY = 'NotoSans'
+FONT_PATH = str(Path(__file__).resolve().parent / 'fonts'
+                / 'NotoSans-Regular.ttf')
+SHOPPING_CART_CACHE_KEY_TEMPLATE = 'shopping_cart_pdf:v1:{}'
+
+loaded_fonts = {}
+
+set_global('FPDF_CACHE_MODE', 1)
 
 
 class PDFWithHeaderFooter(FPDF):
     """Класс с готовыми значениями загаловка и нижнего колонтитула."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.add_font(FONT_FAMILY, style='', fname=FONT_PATH, uni=True)
+
+    def add_font(self, family, style='', fname='', uni=False):
+        """Добавляет шрифт, разбирая файл шрифта один раз на процесс.
+
+        Метрики шрифта берутся из кеша процесса, каждому документу
+        достаются собственные копии изменяемых при выводе словарей.
+        """
+        fontkey = family.lower() + style.upper()
+        if fontkey in self.fonts:
+            return
+        cache_key = (fontkey, fname, uni)
+        if cache_key not in loaded_fonts:
+            super().add_font(family, style=style, fname=fname, uni=uni)
+            font = self.fonts[fontkey]
+            loaded_fonts[cache_key] = (
+                dict(font, subset=list(font.get('subset', ()))),
+                {
+                    name: dict(self.font_files[name])
+                    for name in (fontkey, fname) if name in self.font_files
+                },
+            )
+            return
+        font, font_files = loaded_fonts[cache_key]
+        self.fonts[fontkey] = dict(
+            font, i=len(self.fonts) + 1, subset=list(font.get('subset', ()))
+        )
+        for name, info in font_files.items():
+            self.font_files[name] = dict(info)
+
     def header(self):
-        self.add_font('NotoSans', style='', fname=FONT_PATH, uni=True)
-        self.set_font('NotoSans', size=12)
+        self.set_font(FONT_FAMILY, size=12)
         self.cell(0, 10, 'Список покупок', 10, 1, 'C')
 
     def footer(self):
-        self.add_font('NotoSans', style='', fname=FONT_PATH, uni=True)
         self.set_y(-15)
-        self.set_font('NotoSans', size=8)
+        self.set_font(FONT_FAMILY, size=8)
         self.cell(0, 10, 'Страница ' + str(self.page_no()), 0, 0, 'C')
 
 
 def data_prepare(user):
-    """Метод для забора и  подготовки данных для PDF."""
-    ingredients_data = defaultdict(lambda: ('', 0))
-    ingredients_values = IngredientRecipe.objects.filter(
-        recipe__in_carts__user=user
-    ).values(
-        'ingredient__name',
-        'ingredient__measurement_unit'
-    ).annotate(amount=Sum('amount'))
-
-    for item in ingredients_values:
-        name = item.get('ingredient__name')
-        unit = item.get('ingredient__measurement_unit')
-        amount = item.get('amount')
-        current_unit, current_amount = ingredients_data[name]
-        if not current_unit:
-            current_unit = unit
-        current_amount += amount
-        ingredients_data[name] = (current_unit, current_amount)
-
-    return ingredients_data
-
-
-def make_shopping_cart(user, temp_filename):
-    """Создание списка покупок в PDF."""
+    """Метод для забора и  подготовки данных для PDF.
+
+    Данные берутся из поддерживаемой приращениями таблицы
+    списков покупок одним запросом по пользователю.
+    """
+    return {
+        name: (unit, amount) for name, unit, amount in iter_ingredients(user)
+    }
+
+
+def get_shopping_cart_cache_key(ingredients_data):
+    """Ключ кеша PDF по содержимому списка покупок."""
+    content = json.dumps(list(ingredients_data.items()), ensure_ascii=False)
+    digest = hashlib.sha1(content.encode()).hexdigest()
+    return SHOPPING_CART_CACHE_KEY_TEMPLATE.format(digest)
+
+
+def render_shopping_cart(ingredients_data):
+    """Отрисовка списка покупок в PDF в памяти."""
     pdf = PDFWithHeaderFooter()
-    pdf.add_font('NotoSans', style='', fname=FONT_PATH, uni=True)
     pdf.add_page()
-    pdf.set_font('NotoSans', size=12)
+    pdf.set_font(FONT_FAMILY, size=12)
 
     pdf.cell(INGREDIENT_WIDTH, 10, 'Ингредиент', border=1)
     pdf.cell(MEASUREMENT_WIDTH, 10, 'Е. И.', border=1)
     pdf.cell(AMOUNT_WIDTH, 10, 'Количество', border=1)
     pdf.ln()
 
-    ingredients_data = data_prepare(user)
-
     for name, (unit, amount) in ingredients_data.items():
         amount = str(amount)
         pdf.cell(INGREDIENT_WIDTH, 10, name, border=1)
@@ -70,4 +103,21 @@ def make_shopping_cart(user, temp_filename):
         pdf.cell(AMOUNT_WIDTH, 10, amount, border=1)
         pdf.ln()
 
-    pdf.output(temp_filename)
+    return pdf.output(dest='S').encode('latin1')
+
+
+def make_shopping_cart(user):
+    """Создание списка покупок в PDF.
+
+    Готовый документ кешируется по содержимому списка, поэтому
+    повторная загрузка неизменённого списка не требует отрисовки.
+    """
+    ingredients_data = data_prepare(user)
+    cache_key = get_shopping_cart_cache_key(ingredients_data)
+    pdf_content = cache.get(cache_key)
+    if pdf_content is None:
+        pdf_content = render_shopping_cart(ingredients_data)
+        cache.set(
+            cache_key, pdf_content, settings.SHOPPING_CART_CACHE_TIMEOUT
+        )
+    return pdf_content
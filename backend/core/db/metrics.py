@@ -0,0 +1,41 @@
+import threading
+from collections import defaultdict
+
+
+class ConnectionStats:
+    """Счётчики соединений с одной базой данных в процессе.
+
+    opened — открыто новых соединений, reused — запросов, получивших
+    уже открытое соединение, health_check_failures — соединений,
+    закрытых после неудачной проверки, waits и wait_time — ожидания
+    свободного соединения пула и их суммарная длительность в секундах,
+    timeouts — ожидания, завершившиеся ошибкой.
+    """
+
+    FIELDS = (
+        'opened', 'reused', 'health_check_failures', 'waits', 'wait_time',
+        'timeouts',
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, name, value=1):
+        with self.lock:
+            self.values[name] += value
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+connection_stats = defaultdict(ConnectionStats)
+
+
+def get_connection_stats():
+    """Счётчики соединений процесса по псевдонимам баз данных."""
+    return {
+        alias: stats.snapshot()
+        for alias, stats in list(connection_stats.items())
+    }
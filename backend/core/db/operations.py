@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+class PostgresOnlyMixin:
+    """Выполняет операцию миграции только на PostgreSQL.
+
+    Подходит только для операций, не меняющих состояние моделей:
+    объекты из состояния, например индексы в Meta.indexes, SQLite
+    создаёт заново при каждом пересоздании таблицы.
+    """
+
+    def database_forwards(self, app_label, schema_editor,
+                          from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor,
+                           from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class RunPostgresSQL(PostgresOnlyMixin, migrations.RunSQL):
+    """Выполняет SQL, специфичный для PostgreSQL."""
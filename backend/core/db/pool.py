@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Свободное соединение не появилось за время ожидания."""
+
+
+class ConnectionPool:
+    """Пул соединений процесса, общий для всех его потоков.
+
+    Одновременно выдаётся не больше max_size соединений, остальные
+    потоки ждут освобождения до timeout секунд. Свободные соединения
+    хранятся в порядке LIFO, поэтому редко используемые соединения
+    сверх нужного количества закрываются по max_idle.
+    """
+
+    def __init__(self, connect, max_size, timeout, max_idle=None,
+                 stats=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.stats = stats
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = deque()
+
+    def acquire(self):
+        """Возвращает соединение и признак того, что оно уже открыто."""
+        if not self.slots.acquire(blocking=False):
+            started = time.monotonic()
+            acquired = self.slots.acquire(timeout=self.timeout)
+            if self.stats is not None:
+                self.stats.add('waits')
+                self.stats.add('wait_time', time.monotonic() - started)
+            if not acquired:
+                if self.stats is not None:
+                    self.stats.add('timeouts')
+                raise PoolTimeout(
+                    f'Нет свободного соединения за {self.timeout} с.'
+                )
+        try:
+            connection = self.pop_idle()
+            if connection is not None:
+                return connection, True
+            return self.connect(), False
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def pop_idle(self):
+        expired = []
+        connection = None
+        with self.lock:
+            if self.max_idle is not None:
+                deadline = time.monotonic() - self.max_idle
+                while self.idle and self.idle[0][1] < deadline:
+                    expired.append(self.idle.popleft()[0])
+            if self.idle:
+                connection = self.idle.pop()[0]
+        for stale in expired:
+            self.discard(stale)
+        return connection
+
+    def release(self, connection, reusable=True):
+        """Возвращает соединение в пул или закрывает его."""
+        try:
+            if reusable:
+                with self.lock:
+                    self.idle.append((connection, time.monotonic()))
+            else:
+                self.discard(connection)
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Закрывает все свободные соединения."""
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, _ in idle:
+            self.discard(connection)
@@ -0,0 +1,148 @@
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db.backends.postgresql import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from core.db.metrics import connection_stats
+from core.db.pool import ConnectionPool, PoolTimeout
+
+Database = base.Database
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def close_pools(alias=None):
+    """Закрывает свободные соединения пулов процесса."""
+    with pools_lock:
+        selected = [
+            pool for key, pool in pools.items()
+            if alias is None or key[0] == alias
+        ]
+    for pool in selected:
+        pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с проверкой постоянных соединений и пулом.
+
+    При CONN_HEALTH_CHECKS открытое соединение проверяется один раз
+    за запрос перед первым использованием, разорванное соединение
+    заменяется новым вместо ошибки в запросе. При POOL_SIZE потоки
+    процесса берут соединения из общего пула и возвращают их туда
+    при закрытии, поэтому число соединений не зависит от числа потоков.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False
+        )
+        self.health_check_done = False
+        self.connection_pool = None
+        self.stats = connection_stats[self.alias]
+
+    def get_pool(self, conn_params):
+        size = self.settings_dict.get('POOL_SIZE')
+        if not size:
+            return None
+        key = (self.alias, self.settings_dict['NAME'])
+        with pools_lock:
+            if key not in pools:
+                pools[key] = ConnectionPool(
+                    partial(self.open_connection, conn_params),
+                    max_size=size,
+                    timeout=self.settings_dict.get('POOL_TIMEOUT', 10),
+                    max_idle=self.settings_dict.get('POOL_MAX_IDLE'),
+                    stats=self.stats,
+                )
+            return pools[key]
+
+    def open_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        self.stats.add('opened')
+        return connection
+
+    @staticmethod
+    def check_connection(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        self.connection_pool = self.get_pool(conn_params)
+        if self.connection_pool is None:
+            return self.open_connection(conn_params)
+        while True:
+            try:
+                connection, reused = self.connection_pool.acquire()
+            except PoolTimeout as error:
+                raise Database.OperationalError(str(error)) from error
+            self.isolation_level = connection.isolation_level
+            if not reused:
+                return connection
+            if (
+                not self.health_check_enabled
+                or self.check_connection(connection)
+            ):
+                self.stats.add('reused')
+                return connection
+            self.stats.add('health_check_failures')
+            self.connection_pool.release(connection, reusable=False)
+
+    def connect(self):
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_health_check_failed(self):
+        """Проверяет открытое соединение перед первым запросом."""
+        if self.connection is None or self.health_check_done:
+            return
+        self.health_check_done = True
+        if (
+            self.health_check_enabled
+            and not self.in_atomic_block
+            and not self.is_usable()
+        ):
+            self.stats.add('health_check_failures')
+            self.close()
+        else:
+            self.stats.add('reused')
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Следующий запрос снова проверит соединение перед использованием.
+        self.health_check_done = False
+
+    def is_reusable(self):
+        """Соединение можно вернуть в пул без открытой транзакции."""
+        return (
+            not self.in_atomic_block
+            and not self.connection.closed
+            and self.connection.autocommit
+            and self.connection.get_transaction_status()
+            == TRANSACTION_STATUS_IDLE
+        )
+
+    def _close(self):
+        if self.connection is None or self.connection_pool is None:
+            return super()._close()
+        pool, self.connection_pool = self.connection_pool, None
+        with self.wrap_database_errors:
+            pool.release(self.connection, reusable=self.is_reusable())
+
+    @contextmanager
+    def _nodb_cursor(self):
+        # Свободные соединения пула не дают создать или удалить базу.
+        close_pools(self.alias)
+        with super()._nodb_cursor() as cursor:
+            yield cursor
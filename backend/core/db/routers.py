@@ -0,0 +1,131 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+# Таблицы, чтение которых всегда идёт с основной базы: отставание
+# реплики по токенам приводит к ошибкам авторизации сразу после входа.
+PRIMARY_ONLY_MODELS = {'authtoken.token'}
+
+
+@dataclass
+class RoutingState:
+    """Состояние маршрутизации запроса.
+
+    use_replicas — запросу разрешено читать с реплик, written —
+    запрос уже писал в основную базу и дальше читает только с неё.
+    """
+
+    use_replicas: bool = False
+    written: bool = False
+
+
+routing_state = contextvars.ContextVar('routing_state', default=None)
+
+
+class ReplicaHealth:
+    """Доступность реплик процесса с проверкой не чаще interval секунд.
+
+    Реплика исключается, если к ней нельзя подключиться или её
+    отставание от основной базы больше REPLICA_MAX_LAG секунд.
+    Проверку выполняет один поток, остальные используют прошлый итог.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+        self.healthy = {}
+
+    @staticmethod
+    def check(alias):
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+            if connection.vendor != 'postgresql':
+                return True
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                lag = cursor.fetchone()[0] or 0
+        except Exception:
+            logger.warning('Реплика %s недоступна.', alias, exc_info=True)
+            connection.close()
+            return False
+        if lag > settings.REPLICA_MAX_LAG:
+            logger.warning('Реплика %s отстаёт на %.1f с.', alias, lag)
+            return False
+        return True
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        if now - self.checked.get(alias, 0) < settings.REPLICA_CHECK_INTERVAL:
+            return self.healthy.get(alias, True)
+        if not self.lock.acquire(blocking=False):
+            return self.healthy.get(alias, True)
+        try:
+            self.healthy[alias] = self.check(alias)
+            self.checked[alias] = time.monotonic()
+        finally:
+            self.lock.release()
+        return self.healthy[alias]
+
+
+replica_health = ReplicaHealth()
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+class ReplicaRouter:
+    """Направляет чтение безопасных запросов API на реплики.
+
+    Чтение идёт с реплик, только если middleware разрешило это для
+    запроса GET или HEAD, запрос ещё не писал в базу и не находится
+    в транзакции. Запись, миграции и чтение вне запросов — с основной
+    базы. Недоступные реплики пропускаются.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is None
+            or not state.use_replicas
+            or state.written
+            or model._meta.label_lower in PRIMARY_ONLY_MODELS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        replicas = [
+            alias for alias in get_replicas()
+            if replica_health.is_healthy(alias)
+        ]
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
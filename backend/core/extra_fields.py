@@ -1,17 +1,40 @@
 import base64
+import binascii
 
 import webcolors
+from django.conf import settings
 from django.core.files.base import ContentFile
 from rest_framework import serializers
 
 
 class Base64ImageField(serializers.ImageField):
+    """Поле изображения, принимающее файл или строку data:image в base64.
+
+    Размер изображения ограничен настройкой IMAGE_UPLOAD_MAX_SIZE,
+    размер строки проверяется до её раскодирования.
+    """
+
+    default_error_messages = {
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+        'invalid_base64': 'Изображение должно быть закодировано в base64.',
+    }
+
+    def check_size(self, size):
+        if size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.fail('too_large', max_size=settings.IMAGE_UPLOAD_MAX_SIZE)
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            format, _, imgstr = data.partition(';base64,')
             ext = format.split('/')[-1]
-
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            self.check_size(len(imgstr) * 3 // 4)
+            try:
+                content = base64.b64decode(imgstr, validate=True)
+            except binascii.Error:
+                self.fail('invalid_base64')
+            data = ContentFile(content, name='temp.' + ext)
+        elif getattr(data, 'size', None) is not None:
+            self.check_size(data.size)
 
         return super().to_internal_value(data)
 
@@ -0,0 +1,100 @@
+import io
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+VARIANTS_DIR = 'variants'
+FORMATS = {
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True,
+             'progressive': True},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+
+
+def get_variant_name(name, variant, extension):
+    """Имя файла варианта рядом с исходным изображением."""
+    path = PurePosixPath(name)
+    return str(
+        path.parent / VARIANTS_DIR / f'{path.stem}_{variant}.{extension}'
+    )
+
+
+def build_variants(name):
+    """Создаёт уменьшенные варианты изображения из хранилища.
+
+    Каждый размер из настройки RECIPE_IMAGE_VARIANTS сохраняется
+    в форматах JPEG и WebP, изображение больше не растягивается.
+    Возвращает описание вариантов для поля image_variants.
+    """
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+    variants = {}
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[variant] = {
+            'width': resized.width,
+            'height': resized.height,
+        }
+        for extension, options in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, **options)
+            variant_name = get_variant_name(name, variant, extension)
+            if default_storage.exists(variant_name):
+                default_storage.delete(variant_name)
+            variants[variant][extension] = default_storage.save(
+                variant_name, ContentFile(buffer.getvalue())
+            )
+    return variants
+
+
+def try_build_variants(name):
+    """Создаёт варианты изображения, None — если файл не читается."""
+    try:
+        return build_variants(name)
+    except (OSError, ValueError):
+        return None
+
+
+def get_variant_files(variants):
+    """Имена файлов всех вариантов изображения."""
+    return {
+        name
+        for data in (variants or {}).values()
+        for extension, name in data.items() if extension in FORMATS
+    }
+
+
+def get_variant_urls(variants):
+    """Относительные ссылки на варианты изображения для ответа API."""
+    return {
+        variant: {
+            key: default_storage.url(value) if key in FORMATS else value
+            for key, value in data.items()
+        }
+        for variant, data in (variants or {}).items()
+    }
+
+
+def update_recipe_variants(recipe):
+    """Пересоздаёт варианты изображения рецепта и сохраняет их.
+
+    Файлы вариантов прежнего изображения удаляются из хранилища,
+    если они не используются другими рецептами.
+    """
+    previous = recipe.image_variants
+    recipe.image_variants = build_variants(recipe.image.name)
+    recipe.save(update_fields=['image_variants'])
+    if not previous or type(recipe).objects.filter(
+        image_variants=previous
+    ).exists():
+        return
+    stale = get_variant_files(previous)
+    for name in stale - get_variant_files(recipe.image_variants):
+        default_storage.delete(name)
@@ -0,0 +1,107 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from core.cache import INGREDIENTS_NAMESPACE, bumped_versions, get_version
+from recipes.models import Ingredient
+
+
+NGRAM_SIZE = 3
+# Как часто, в секундах, сверять версию ингредиентов с общим кешем.
+VERSION_CHECK_INTERVAL = 1
+
+
+def make_ngrams(value):
+    """Возвращает множество n-грамм строки."""
+    return {
+        value[index:index + NGRAM_SIZE]
+        for index in range(len(value) - NGRAM_SIZE + 1)
+    }
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Отсортированный список названий служит префиксным индексом,
+    n-граммы названий — индексом поиска по вхождению. Индекс
+    перестраивается при изменении версии ингредиентов. Версия
+    читается из общего кеша не чаще раза в VERSION_CHECK_INTERVAL,
+    изменения из этого же процесса видны сразу.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = None
+        self.checked = 0
+
+    def build(self, version):
+        ingredients = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda item: item['name'].casefold()
+        )
+        keys = [item['name'].casefold() for item in ingredients]
+        ngrams = defaultdict(set)
+        for position, key in enumerate(keys):
+            for ngram in make_ngrams(key):
+                ngrams[ngram].add(position)
+        return version, keys, ingredients, dict(ngrams)
+
+    def get_state(self):
+        state = self.state
+        now = time.monotonic()
+        if (
+            state is not None
+            and now - self.checked < VERSION_CHECK_INTERVAL
+            and bumped_versions.get(INGREDIENTS_NAMESPACE, 0) <= state[0]
+        ):
+            return state
+        version = get_version(INGREDIENTS_NAMESPACE)
+        self.checked = now
+        if state is None or state[0] != version:
+            with self.lock:
+                state = self.state
+                if state is None or state[0] != version:
+                    state = self.state = self.build(version)
+        return state
+
+    def search(self, value, limit=None):
+        """Ищет ингредиенты по началу названия и по вхождению.
+
+        Совпадения по началу названия идут первыми, затем совпадения
+        по вхождению, упорядоченные по позиции вхождения.
+        """
+        _, keys, ingredients, ngrams = self.get_state()
+        value = value.casefold()
+        if limit is None:
+            limit = len(keys)
+
+        positions = []
+        position = bisect_left(keys, value)
+        while (position < len(keys) and len(positions) < limit
+               and keys[position].startswith(value)):
+            positions.append(position)
+            position += 1
+
+        if len(positions) < limit:
+            if len(value) < NGRAM_SIZE:
+                candidates = range(len(keys))
+            else:
+                postings = sorted(
+                    (ngrams.get(ngram, set()) for ngram in make_ngrams(value)),
+                    key=len
+                )
+                candidates = set.intersection(*postings)
+            contains = sorted(
+                (keys[position].find(value), position)
+                for position in candidates
+                if keys[position].find(value) > 0
+            )
+            positions.extend(
+                position for _, position in contains[:limit - len(positions)]
+            )
+
+        return [ingredients[position] for position in positions]
+
+
+ingredient_index = IngredientIndex()
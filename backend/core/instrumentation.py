@@ -0,0 +1,62 @@
+import contextvars
+import time
+from collections import Counter
+
+
+class RequestMetrics:
+    """Запросы к базе данных и время обработки одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_name = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """Число повторов одинаковых запросов сверх первого.
+
+        Запросы сравниваются по SQL без параметров, поэтому запросы
+        в цикле по строкам (N+1) дают большое число повторов.
+        """
+        return sum(
+            count - 1 for count in self.statements.values() if count > 1
+        )
+
+    def get_duplicate_patterns(self, limit=3):
+        return [
+            {'sql': sql[:300], 'count': count}
+            for sql, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+
+request_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка выполнения запросов, считающая запросы текущего запроса.
+
+    Вне HTTP-запросов обёртка только передаёт вызов дальше.
+    """
+    metrics = request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """Подключает record_query к соединению при его открытии."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,169 @@
+import logging
+import signal
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+# Запас времени на сохранение результата задачи, прерванной по
+# JOB_TIMEOUT, прежде чем задачу заберёт другой обработчик.
+STALE_JOB_GRACE = 60
+
+
+class JobTimeoutError(Exception):
+    """Задача выполнялась дольше отведённого времени."""
+
+
+def task(name):
+    """Регистрирует функцию как фоновую задачу с заданным именем.
+
+    Функция получает задачу и её параметры и возвращает результат,
+    который можно сохранить в JSON. Задача может быть выполнена
+    повторно, если обработчик был убит во время её выполнения,
+    поэтому функция должна быть идемпотентной.
+    """
+    def register(function):
+        TASKS[name] = function
+        return function
+    return register
+
+
+def enqueue(name, user=None, max_attempts=3, **payload):
+    """Ставит задачу в очередь и возвращает её.
+
+    Задача сохраняется в текущей транзакции и становится видна
+    обработчикам только после её фиксации. При JOBS_RUN_INLINE
+    задача выполняется сразу после фиксации в этом же процессе.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Неизвестная задача: {name}.')
+    job = Job.objects.create(
+        name=name, user=user, payload=payload, max_attempts=max_attempts
+    )
+    if settings.JOBS_RUN_INLINE:
+        transaction.on_commit(lambda: run_inline(job.pk))
+    return job
+
+
+def run_inline(pk):
+    job = claim_job(Job.objects.filter(pk=pk))
+    if job is not None:
+        run_job(job)
+
+
+def claim_job(queryset=None):
+    """Забирает следующую готовую к выполнению задачу.
+
+    Строка блокируется с SKIP LOCKED, поэтому несколько обработчиков
+    не получают одну задачу. Обработчик прерывает задачу по истечении
+    JOB_TIMEOUT, поэтому задача, которая числится выполняющейся дольше
+    JOB_TIMEOUT и STALE_JOB_GRACE, осталась от убитого обработчика
+    и выполняется повторно.
+    """
+    now = timezone.now()
+    stale_after = timedelta(seconds=settings.JOB_TIMEOUT + STALE_JOB_GRACE)
+    if queryset is None:
+        queryset = Job.objects.all()
+    with transaction.atomic():
+        job = queryset.select_for_update(skip_locked=True).filter(
+            Q(status=Job.Status.PENDING, run_after__lte=now)
+            | Q(status=Job.Status.RUNNING,
+                started_at__lt=now - stale_after)
+        ).order_by('run_after', 'pk').first()
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.save(update_fields=['status', 'attempts', 'started_at'])
+    return job
+
+
+def get_retry_delay(attempts):
+    """Задержка перед повтором растёт вдвое с каждой попыткой."""
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+@contextmanager
+def time_limit(seconds):
+    """Прерывает выполнение блока через seconds секунд.
+
+    Ограничение использует SIGALRM, поэтому действует только в главном
+    потоке процесса; в остальных потоках блок выполняется без него.
+    """
+    if (
+        not seconds
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def interrupt(signum, frame):
+        raise JobTimeoutError(f'Задача выполнялась дольше {seconds} с.')
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_job(job, timeout=None):
+    """Выполняет забранную задачу и сохраняет её результат.
+
+    При ошибке или превышении timeout секунд задача возвращается
+    в очередь с задержкой, пока не исчерпаны попытки. Для каждой
+    попытки сохраняются время завершения и длительность.
+    """
+    started = time.perf_counter()
+    try:
+        if job.name not in TASKS:
+            raise ValueError(f'Неизвестная задача: {job.name}.')
+        if job.attempts > job.max_attempts:
+            raise TimeoutError('Задача прервана, попытки исчерпаны.')
+        with time_limit(timeout):
+            result = TASKS[job.name](job, **job.payload)
+    except Exception:
+        logger.exception('Job %s #%s failed', job.name, job.pk)
+        job.error = traceback.format_exc()
+        if job.name in TASKS and job.attempts < job.max_attempts:
+            job.status = Job.Status.PENDING
+            job.run_after = timezone.now() + get_retry_delay(job.attempts)
+        else:
+            job.status = Job.Status.FAILED
+    else:
+        job.status = Job.Status.SUCCEEDED
+        job.result = result
+        job.error = ''
+    job.duration = time.perf_counter() - started
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        'status', 'result', 'file', 'error', 'run_after', 'finished_at',
+        'duration',
+    ])
+    return job
+
+
+def purge_jobs(days):
+    """Удаляет завершённые задачи старше days дней вместе с файлами."""
+    jobs = Job.objects.filter(
+        status__in=(Job.Status.SUCCEEDED, Job.Status.FAILED),
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    )
+    for job in jobs.exclude(file='').only('file').iterator():
+        job.file.delete(save=False)
+    return jobs.delete()[0]
@@ -0,0 +1,217 @@
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+
+MODES = ('wsgi', 'asgi')
+START_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput and latency of gunicorn in sync (wsgi) '
+        'and async (asgi) modes under concurrent read requests.'
+    )
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Email of the benchmark user, by default '
+                           'the first user.'
+        )
+        parser.add_argument(
+            '--modes', nargs='+', choices=MODES, default=list(MODES),
+            help='Server modes to benchmark.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Number of gunicorn worker processes in every mode.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help='Number of simultaneous clients.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Number of measured requests per mode.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=50,
+            help='Number of unmeasured requests per mode.'
+        )
+        parser.add_argument(
+            '--output', help='Write results to this JSON file.'
+        )
+
+    @staticmethod
+    def get_paths():
+        """Маршруты чтения, которые запрашивают клиенты по кругу."""
+        recipes = list(Recipe.objects.order_by('-pub_date').values_list(
+            'pk', flat=True
+        )[:50])
+        names = Ingredient.objects.values_list('name', flat=True)[:20]
+        if not recipes:
+            raise CommandError('No recipes found, run generatedata first.')
+        paths = [
+            '/api/recipes/?page=1&limit=6',
+            '/api/tags/',
+            '/api/users/subscriptions/?limit=6&recipes_limit=3',
+        ]
+        paths.extend(f'/api/recipes/{pk}/' for pk in recipes[:10])
+        paths.extend(
+            f'/api/ingredients/?name={quote(name[:3])}' for name in names[:5]
+        )
+        return paths
+
+    @staticmethod
+    def get_free_port():
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    @staticmethod
+    def wait_for_server(process, port):
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(
+                    f'gunicorn exited with code {process.returncode}.'
+                )
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'gunicorn did not start in {START_TIMEOUT} s.')
+
+    def start_server(self, mode, port, workers):
+        """Запускает gunicorn с настройками проекта в заданном режиме."""
+        env = dict(os.environ, SERVER_MODE=mode)
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(workers),
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_for_server(process, port)
+        except CommandError:
+            process.kill()
+            raise
+        return process
+
+    @staticmethod
+    def run_load(port, token, paths, total, concurrency):
+        """Выполняет total запросов в concurrency потоков.
+
+        У каждого потока своё соединение, оно переоткрывается, если
+        сервер закрыл его после ответа. Возвращает длительности в мс.
+        """
+        local = threading.local()
+        paths = cycle(paths)
+        paths_lock = threading.Lock()
+        headers = {'Authorization': f'Token {token}'}
+
+        def request(_):
+            with paths_lock:
+                path = next(paths)
+            if not hasattr(local, 'connection'):
+                local.connection = http.client.HTTPConnection(
+                    '127.0.0.1', port, timeout=60
+                )
+            started = time.perf_counter()
+            local.connection.request('GET', path, headers=headers)
+            response = local.connection.getresponse()
+            response.read()
+            duration = time.perf_counter() - started
+            if response.status >= 400:
+                raise CommandError(
+                    f'GET {path} failed with status {response.status}.'
+                )
+            return duration * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            durations = list(executor.map(request, range(total)))
+        return durations, time.perf_counter() - started
+
+    @staticmethod
+    def percentile(values, percent):
+        values = sorted(values)
+        index = min(len(values) - 1, int(len(values) * percent / 100))
+        return values[index]
+
+    def benchmark(self, mode, token, paths, options):
+        port = self.get_free_port()
+        process = self.start_server(mode, port, options['workers'])
+        try:
+            self.run_load(
+                port, token, paths, options['warmup'],
+                options['concurrency']
+            )
+            durations, elapsed = self.run_load(
+                port, token, paths, options['requests'],
+                options['concurrency']
+            )
+        finally:
+            process.terminate()
+            process.wait()
+        return {
+            'requests': len(durations),
+            'throughput_rps': round(len(durations) / elapsed, 1),
+            'p50_ms': round(statistics.median(durations), 3),
+            'p99_ms': round(self.percentile(durations, 99), 3),
+            'mean_ms': round(statistics.mean(durations), 3),
+        }
+
+    def handle(self, *args, **options):
+        """Поочерёдно запускает сервер в каждом режиме и нагружает его."""
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(email=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('User not found.')
+        token, _ = Token.objects.get_or_create(user=user)
+        paths = self.get_paths()
+        results = {}
+        for mode in options['modes']:
+            results[mode] = self.benchmark(mode, token.key, paths, options)
+            self.stdout.write(
+                f'{mode:<6}{results[mode]["throughput_rps"]:>10.1f} rps  '
+                f'p50 {results[mode]["p50_ms"]:>8.2f} ms  '
+                f'p99 {results[mode]["p99_ms"]:>8.2f} ms'
+            )
+        if options['output']:
+            report = {
+                'meta': {
+                    'workers': options['workers'],
+                    'concurrency': options['concurrency'],
+                    'async_view_threads': settings.ASYNC_VIEW_THREADS,
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.creation_pdf import data_prepare, render_shopping_cart
+from core.shopping_list_export import EXPORTERS
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare shopping list export formats for a user.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to export.')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Number of exports per format.'
+        )
+
+    @staticmethod
+    def measure(export):
+        """Возвращает время до первой части и полное время выгрузки."""
+        started = time.perf_counter()
+        chunks = iter(export())
+        first_chunk = next(chunks, b'')
+        first_byte = time.perf_counter() - started
+        size = len(first_chunk) + sum(len(chunk) for chunk in chunks)
+        return first_byte, time.perf_counter() - started, size
+
+    def handle(self, *args, **options):
+        """Выгружает список покупок во всех форматах и печатает время."""
+        user = User.objects.filter(email=options['email']).first()
+        if user is None:
+            raise CommandError(f'User {options["email"]} not found.')
+
+        exports = {
+            'pdf': lambda: [render_shopping_cart(data_prepare(user))],
+            **{
+                export_format: (lambda exporter=exporter: exporter(user))
+                for export_format, exporter in EXPORTERS.items()
+            },
+        }
+        self.stdout.write(
+            f'{"format":<8}{"first byte, ms":>16}{"total, ms":>12}'
+            f'{"size, bytes":>14}'
+        )
+        for export_format, export in exports.items():
+            results = [
+                self.measure(export) for _ in range(options['repeat'])
+            ]
+            first_byte, total, size = (
+                statistics.median(values) for values in zip(*results)
+            )
+            self.stdout.write(
+                f'{export_format:<8}{first_byte * 1000:>16.2f}'
+                f'{total * 1000:>12.2f}{int(size):>14}'
+            )
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import invalidate_recipes
+from core.images import try_build_variants
+from core.recipe_dataset import image_workers
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Build resized JPEG and WebP variants of recipe images.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Rebuild variants of recipes that already have them.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of recipes updated per query.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes resizing images.'
+        )
+
+    def handle(self, *args, **options):
+        """Создаёт варианты изображений пачками рецептов."""
+        recipes = Recipe.objects.order_by('pk').only('pk', 'image')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        built_count = failed_count = 0
+        last_pk = 0
+        with image_workers(options['workers']) as mapper:
+            while True:
+                batch = list(
+                    recipes.filter(pk__gt=last_pk)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                names = sorted({recipe.image.name for recipe in batch})
+                variants = dict(zip(names, mapper(try_build_variants, names)))
+                updated = []
+                for recipe in batch:
+                    recipe.image_variants = variants[recipe.image.name]
+                    if recipe.image_variants is None:
+                        failed_count += 1
+                        continue
+                    updated.append(recipe)
+                Recipe.objects.bulk_update(updated, ['image_variants'])
+                invalidate_recipes(recipe.pk for recipe in updated)
+                built_count += len(updated)
+                self.stdout.write(f'{built_count} recipes updated')
+        self.stdout.write(self.style.SUCCESS(
+            f'Built image variants for {built_count} recipes, '
+            f'{failed_count} images could not be read.'
+        ))
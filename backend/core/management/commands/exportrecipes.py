@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from core.recipe_dataset import (copy_images, dump_recipe, export_image,
+                                 image_workers, iter_recipe_batches,
+                                 open_stream)
+
+
+class Command(BaseCommand):
+    help = 'Export recipes with authors, tags and ingredients to JSONL.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Output JSONL file, "-" for standard output.'
+        )
+        parser.add_argument(
+            '--images', help='Directory to copy recipe images into.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of recipes loaded per query.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes copying images.'
+        )
+
+    def handle(self, *args, **options):
+        """Выгружает рецепты пачками, не держа выгрузку в памяти."""
+        recipes_count = images_count = 0
+        with open_stream(options['path'], 'w') as output, \
+                image_workers(options['workers']) as mapper:
+            for batch in iter_recipe_batches(options['batch_size']):
+                output.writelines(dump_recipe(recipe) for recipe in batch)
+                recipes_count += len(batch)
+                if options['images']:
+                    images_count += copy_images(
+                        mapper,
+                        export_image,
+                        [recipe.image.name for recipe in batch],
+                        options['images']
+                    )
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {recipes_count} recipes and {images_count} images.'
+        ))
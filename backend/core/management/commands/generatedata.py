@@ -0,0 +1,212 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from core import shopping_list
+from core.counters import COUNTERS, get_chunks, recount_chunk
+from core.recipe_dataset import batches
+from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
+                            Recipe, Tag, TagRecipe)
+from users.models import Follow, User
+
+IMAGE_NAME = 'recipes/images/generated.png'
+PASSWORD = 'generated-password'
+
+
+class Command(BaseCommand):
+    help = 'Generate users, recipes, follows, favorites and carts.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Average number of follows per user.'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=30,
+            help='Average number of favorites per user.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Average number of recipes in a cart per user.'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=8,
+            help='Average number of ingredients per recipe.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent of author and recipe popularity, 0 is uniform.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Publication dates are spread over this many days.'
+        )
+        parser.add_argument(
+            '--prefix', default='generated',
+            help='Prefix of generated usernames, emails and recipe names.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def zipf_weights(self, size):
+        """Накопленные веса рангов по закону Ципфа."""
+        return list(accumulate(
+            1 / (rank ** self.skew) for rank in range(1, size + 1)
+        ))
+
+    def sample(self, population, weights, count):
+        """Выбирает до count разных элементов с учётом весов."""
+        count = min(count, len(population))
+        chosen = set()
+        for _ in range(count * 3):
+            if len(chosen) >= count:
+                break
+            chosen.update(self.random.choices(
+                population, cum_weights=weights, k=count - len(chosen)
+            ))
+        return chosen
+
+    def amount(self, average):
+        """Случайное количество со средним значением average."""
+        return int(self.random.expovariate(1 / average)) if average else 0
+
+    def bulk_create(self, model, objects):
+        for batch in batches(objects, self.batch_size):
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    @staticmethod
+    def save_image():
+        """Сохраняет общее для рецептов изображение, если его нет."""
+        if default_storage.exists(IMAGE_NAME):
+            return
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (230, 150, 90)).save(buffer, 'PNG')
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+
+    def create_users(self, count, prefix):
+        password = make_password(PASSWORD)
+        self.bulk_create(User, (
+            User(
+                email=f'{prefix}{number}@example.com',
+                username=f'{prefix}{number}',
+                first_name='Имя',
+                last_name='Фамилия',
+                password=password,
+            )
+            for number in range(count)
+        ))
+        return list(User.objects.filter(
+            username__startswith=prefix
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def create_recipes(self, count, prefix, authors, days):
+        author_weights = self.zipf_weights(len(authors))
+        tags = list(Tag.objects.values_list('pk', flat=True))
+        ingredients = list(Ingredient.objects.values_list('pk', flat=True))
+        now = timezone.now()
+        for numbers in batches(range(count), self.batch_size):
+            recipes = [
+                Recipe(
+                    author_id=self.random.choices(
+                        authors, cum_weights=author_weights
+                    )[0],
+                    name=f'{prefix} recipe {number}',
+                    text='Описание рецепта. ' * self.random.randint(5, 50),
+                    cooking_time=self.random.randint(5, 180),
+                    image=IMAGE_NAME,
+                )
+                for number in numbers
+            ]
+            Recipe.objects.bulk_create(recipes, ignore_conflicts=True)
+            recipes = list(Recipe.objects.filter(
+                name__in=[recipe.name for recipe in recipes]
+            ))
+            for recipe in recipes:
+                recipe.pub_date = now - timedelta(
+                    seconds=self.random.randint(0, days * 24 * 60 * 60)
+                )
+            Recipe.objects.bulk_update(recipes, ['pub_date'])
+            TagRecipe.objects.bulk_create((
+                TagRecipe(recipe=recipe, tag_id=tag)
+                for recipe in recipes
+                for tag in self.random.sample(
+                    tags, min(len(tags), self.random.randint(1, 3))
+                )
+            ), ignore_conflicts=True)
+            IngredientRecipe.objects.bulk_create((
+                IngredientRecipe(
+                    recipe=recipe,
+                    ingredient_id=ingredient,
+                    amount=self.random.randint(1, 500),
+                )
+                for recipe in recipes
+                for ingredient in self.random.sample(
+                    ingredients,
+                    min(len(ingredients), 1 + self.amount(self.ingredients))
+                )
+            ), ignore_conflicts=True)
+            self.stdout.write(f'recipes: {numbers[-1] + 1} of {count}')
+
+    def create_relations(self, model, target, users, population, average):
+        """Связывает пользователей с популярными объектами."""
+        weights = self.zipf_weights(len(population))
+        self.bulk_create(model, (
+            model(user_id=user, **{f'{target}_id': obj})
+            for user in users
+            for obj in self.sample(population, weights, self.amount(average))
+            if (target, obj) != ('author', user)
+        ))
+
+    def handle(self, *args, **options):
+        """Создаёт данные массовыми вставками."""
+        self.random = random.Random(options['seed'])
+        self.skew = options['skew']
+        self.batch_size = options['batch_size']
+        self.ingredients = options['ingredients']
+        prefix = options['prefix']
+        if not Tag.objects.exists() or not Ingredient.objects.exists():
+            raise CommandError('Load tags and ingredients first.')
+        self.save_image()
+        users = self.create_users(options['users'], prefix)
+        self.stdout.write(f'users: {len(users)}')
+        self.create_recipes(
+            options['recipes'], prefix, users, options['days']
+        )
+        # Новые рецепты популярнее старых.
+        recipes = list(Recipe.objects.filter(
+            author__username__startswith=prefix
+        ).order_by('-pub_date').values_list('pk', flat=True))
+        self.create_relations(
+            Follow, 'author', users, users, options['follows']
+        )
+        self.stdout.write('follows created')
+        self.create_relations(
+            Favorite, 'recipe', users, recipes, options['favorites']
+        )
+        self.stdout.write('favorites created')
+        with transaction.atomic():
+            self.create_relations(
+                Cart, 'recipe', users, recipes, options['carts']
+            )
+            for batch in batches(users, self.batch_size):
+                shopping_list.rebuild(batch)
+        for name in COUNTERS:
+            for chunk in get_chunks(name, self.batch_size):
+                recount_chunk(chunk)
+        self.stdout.write('counters recounted')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated data for {len(users)} users with password '
+            f'"{PASSWORD}".'
+        ))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from core.recipe_dataset import (batches, bump_catalog_versions, copy_images,
+                                 image_workers, import_batch, import_image,
+                                 open_stream, parse_records)
+
+
+class Command(BaseCommand):
+    help = 'Import recipes with authors, tags and ingredients from JSONL.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Input JSONL file, "-" for standard input.'
+        )
+        parser.add_argument(
+            '--images', help='Directory to copy recipe images from.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of recipes inserted per transaction.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes copying images.'
+        )
+
+    def handle(self, *args, **options):
+        """Загружает рецепты пачками массовыми вставками."""
+        read_count = recipes_count = images_count = 0
+        tags_changed = ingredients_changed = False
+        try:
+            with open_stream(options['path']) as source, \
+                    image_workers(options['workers']) as mapper:
+                records = parse_records(source)
+                for batch in batches(records, options['batch_size']):
+                    recipes, tags_created, ingredients_created = (
+                        import_batch(batch)
+                    )
+                    read_count += len(batch)
+                    recipes_count += len(recipes)
+                    tags_changed |= tags_created
+                    ingredients_changed |= ingredients_created
+                    if options['images']:
+                        images_count += copy_images(
+                            mapper,
+                            import_image,
+                            [recipe.image.name for recipe in recipes],
+                            options['images']
+                        )
+                    self.stderr.write(
+                        f'{read_count} read, {recipes_count} imported'
+                    )
+        finally:
+            bump_catalog_versions(tags_changed, ingredients_changed)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {recipes_count} of {read_count} recipes '
+            f'and {images_count} images.'
+        ))
@@ -1,42 +1,53 @@
-import csv
+from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from pathlib import Path
 
-from recipes.models import Ingredient, Tag
+from core.cache import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE, bump_version
+from core.catalog_import import CATALOGS, load_catalog
+
+NAMESPACES = {'ingredients': INGREDIENTS_NAMESPACE, 'tags': TAGS_NAMESPACE}
 
 
 class Command(BaseCommand):
-    help = 'Import ingredients and tags from csv data.'
+    help = 'Import ingredients and tags from csv or json data.'
     requires_migrations_checks = True
 
-    @staticmethod
-    def import_data_from_csv(file_name, model, obj_keys):
-        """Импортирует данные из CSV в базу данных для указанной модели."""
-        with open(Path(settings.CSV_FILES_DIR) / file_name, "rt") as file:
-            file.readline()
-            names = set()
-            for row in csv.reader(file, dialect="excel"):
-                name = next(iter(row))
-                if name in names:
-                    continue
-                names.add(name)
-                obj_kwargs = {key: value for key, value in zip(obj_keys, row)}
-                model.objects.get_or_create(**obj_kwargs)
+    def add_arguments(self, parser):
+        data_dir = Path(settings.CSV_FILES_DIR)
+        parser.add_argument(
+            '--ingredients', default=data_dir / 'ingredients.csv',
+            help='Ingredients file, csv or json.'
+        )
+        parser.add_argument(
+            '--tags', default=data_dir / 'tags.csv',
+            help='Tags file, csv or json.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Number of rows sent to the database at once.'
+        )
 
     def handle(self, *args, **options):
-        """Начинает импортировать и записывать данные в базу данных."""
-        try:
-            self.import_data_from_csv(
-                'ingredients.csv', Ingredient, ['name', 'measurement_unit']
-            )
-            self.import_data_from_csv(
-                'tags.csv', Tag, ['name', 'color', 'slug']
+        """Загружает каталоги и печатает итоги по каждому из них."""
+        for name, catalog in CATALOGS.items():
+            path = options[name]
+
+            def progress(count, name=name):
+                self.stdout.write(f'{name}: {count} rows loaded')
+
+            def errors(number, message, path=path):
+                self.stderr.write(
+                    self.style.WARNING(f'{path}:{number}: {message}')
+                )
+
+            counts = load_catalog(
+                catalog, path, options['batch_size'], progress, errors
             )
-        except Exception as error:
-            self.stdout.write(self.style.ERROR(error))
-            raise error
-        self.stdout.write(
-            self.style.SUCCESS('Successful csv data import!')
-        )
+            if counts['inserted'] or counts['updated']:
+                bump_version(NAMESPACES[name])
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: ' + ', '.join(
+                    f'{count} {state}' for state, count in counts.items()
+                )
+            ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+
+from core import shopping_list
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Rebuild aggregated shopping lists from carts.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            nargs='+',
+            type=int,
+            help='Rebuild shopping lists of the given users only.'
+        )
+
+    def handle(self, *args, **options):
+        """Пересчитывает списки покупок в одной транзакции."""
+        with transaction.atomic(using=router.db_for_write(ShoppingListItem)):
+            shopping_list.rebuild(options['users'])
+        self.stdout.write(
+            self.style.SUCCESS('Shopping lists rebuilt successfully!')
+        )
@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.counters import COUNTERS, get_chunks, recount_chunk
+
+
+class Command(BaseCommand):
+    help = 'Recount favorite, recipe and follower counters.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', nargs='+', choices=sorted(COUNTERS),
+            help='Recount only the given counters.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Number of primary keys recounted by one query.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes recounting chunks.'
+        )
+
+    @staticmethod
+    def recount(chunks, workers):
+        """Пересчитывает части в нескольких процессах.
+
+        Соединения с базой закрываются до запуска пула, чтобы
+        дочерние процессы не делили их с основным.
+        """
+        if workers <= 1:
+            return sum(map(recount_chunk, chunks))
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(recount_chunk, chunks))
+
+    def handle(self, *args, **options):
+        """Пересчитывает счётчики частями по диапазонам ключей."""
+        for name in options['only'] or COUNTERS:
+            chunks = get_chunks(name, options['chunk_size'])
+            fixed = self.recount(chunks, options['workers'])
+            self.stdout.write(
+                f'{name}: {len(chunks)} chunks, {fixed} rows fixed'
+            )
+        self.stdout.write(self.style.SUCCESS('Counters recounted.'))
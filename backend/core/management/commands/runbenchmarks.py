@@ -0,0 +1,258 @@
+import json
+import platform
+import statistics
+import time
+from itertools import cycle
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import (CaptureQueriesContext,
+                               setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Cart, Ingredient, Recipe, Tag
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the main API endpoints with the test client.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Email of the benchmark user, by default the user '
+                 'with the largest cart.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=100,
+            help='Number of measured requests per scenario.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Number of unmeasured requests per scenario.'
+        )
+        parser.add_argument(
+            '--only', nargs='+', help='Run only the given scenarios.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Clear the cache before every request.'
+        )
+        parser.add_argument(
+            '--output', help='Write results to this JSON file.'
+        )
+        parser.add_argument(
+            '--baseline', help='Compare results with this JSON file.'
+        )
+        parser.add_argument(
+            '--max-regression', type=float,
+            help='Fail if p50 of any scenario grows by more percent.'
+        )
+
+    @staticmethod
+    def get_user(email):
+        if email:
+            user = User.objects.filter(email=email).first()
+            if user is None:
+                raise CommandError(f'User {email} not found.')
+            return user
+        cart = Cart.objects.values('user').order_by().annotate(
+            recipes=Count('recipe')
+        ).order_by('-recipes').first()
+        if cart is None:
+            raise CommandError('No carts found, run generatedata first.')
+        return User.objects.get(pk=cart['user'])
+
+    @staticmethod
+    def get_scenarios(user):
+        """Сценарии нагрузки: название и функция одного запроса.
+
+        Функция возвращает ответы, все они должны быть успешными.
+        Сценарии с записью возвращают данные в исходное состояние.
+        """
+        recipes = cycle(Recipe.objects.exclude(
+            author=user
+        ).exclude(
+            in_favorites__user=user
+        ).exclude(
+            in_carts__user=user
+        ).order_by('-pub_date').values_list('pk', flat=True)[:100])
+        tags = cycle(Tag.objects.values_list('slug', flat=True))
+        last_page = max(1, Recipe.objects.count() // 6)
+        prefixes = cycle(sorted({
+            name[:3] for name in Ingredient.objects.values_list(
+                'name', flat=True
+            )[:200]
+        }))
+
+        def toggle(path):
+            def request(client):
+                url = f'/api/recipes/{next(recipes)}/{path}/'
+                return [client.post(url), client.delete(url)]
+            return request
+
+        return {
+            'recipe_list': lambda client: [
+                client.get('/api/recipes/?page=1&limit=6')
+            ],
+            'recipe_list_deep_page': lambda client: [
+                client.get(f'/api/recipes/?page={last_page}&limit=6')
+            ],
+            'recipe_list_cursor': lambda client: [
+                client.get('/api/recipes/?cursor=&limit=6')
+            ],
+            'recipe_list_tags': lambda client: [
+                client.get(f'/api/recipes/?limit=6&tags={next(tags)}')
+            ],
+            'recipe_list_favorited': lambda client: [
+                client.get('/api/recipes/?limit=6&is_favorited=1')
+            ],
+            'recipe_list_search': lambda client: [
+                client.get('/api/recipes/?limit=6&search=рецепт')
+            ],
+            'recipe_detail': lambda client: [
+                client.get(f'/api/recipes/{next(recipes)}/')
+            ],
+            'subscriptions': lambda client: [
+                client.get(
+                    '/api/users/subscriptions/?limit=6&recipes_limit=3'
+                )
+            ],
+            'ingredient_search': lambda client: [
+                client.get(f'/api/ingredients/?name={next(prefixes)}')
+            ],
+            'favorite_toggle': toggle('favorite'),
+            'cart_toggle': toggle('shopping_cart'),
+            'download_shopping_cart_pdf': lambda client: [
+                client.get('/api/recipes/download_shopping_cart/')
+            ],
+            'download_shopping_cart_txt': lambda client: [
+                client.get(
+                    '/api/recipes/download_shopping_cart/?format=txt'
+                )
+            ],
+        }
+
+    @staticmethod
+    def percentile(values, percent):
+        values = sorted(values)
+        index = min(len(values) - 1, int(len(values) * percent / 100))
+        return values[index]
+
+    def run_scenario(self, client, request, repeat, warmup, cold):
+        """Выполняет сценарий и возвращает сводку измерений в мс."""
+        durations = []
+        queries = []
+        for number in range(warmup + repeat):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                responses = request(client)
+                for response in responses:
+                    # Потоковые ответы читаются до конца.
+                    b''.join(getattr(response, 'streaming_content', []))
+                duration = time.perf_counter() - started
+            failed = [
+                response.status_code for response in responses
+                if response.status_code >= 400
+            ]
+            if failed:
+                raise CommandError(f'Request failed with status {failed}.')
+            if number >= warmup:
+                durations.append(duration * 1000)
+                queries.append(len(context.captured_queries))
+        return {
+            'requests': repeat,
+            'p50_ms': round(statistics.median(durations), 3),
+            'p99_ms': round(self.percentile(durations, 99), 3),
+            'mean_ms': round(statistics.mean(durations), 3),
+            'throughput_rps': round(len(durations) / sum(durations) * 1000, 1),
+            'queries_median': statistics.median(queries),
+            'queries_max': max(queries),
+        }
+
+    def compare(self, results, baseline_path, max_regression):
+        """Печатает изменение p50 относительно базовых результатов."""
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = []
+        self.stdout.write(
+            f'{"scenario":<30}{"base p50":>10}{"p50":>10}{"change":>10}'
+            f'{"queries":>10}'
+        )
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            change = (result['p50_ms'] / base['p50_ms'] - 1) * 100
+            self.stdout.write(
+                f'{name:<30}{base["p50_ms"]:>10.2f}{result["p50_ms"]:>10.2f}'
+                f'{change:>+9.1f}%'
+                f'{base["queries_median"]:>5g} → {result["queries_median"]:g}'
+            )
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(
+                f'p50 regressed by more than {max_regression}%: '
+                + ', '.join(regressions)
+            )
+
+    def handle(self, *args, **options):
+        """Прогоняет сценарии тестовым клиентом и сохраняет результаты."""
+        user = self.get_user(options['user'])
+        token, _ = Token.objects.get_or_create(user=user)
+        scenarios = self.get_scenarios(user)
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Unknown scenarios: {sorted(unknown)}.')
+            scenarios = {
+                name: scenarios[name] for name in options['only']
+            }
+        setup_test_environment()
+        try:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            results = {}
+            for name, request in scenarios.items():
+                results[name] = self.run_scenario(
+                    client, request, options['repeat'], options['warmup'],
+                    options['cold']
+                )
+                self.stdout.write(
+                    f'{name:<30}p50 {results[name]["p50_ms"]:>8.2f} ms  '
+                    f'p99 {results[name]["p99_ms"]:>8.2f} ms  '
+                    f'{results[name]["throughput_rps"]:>8.1f} rps  '
+                    f'{results[name]["queries_median"]:>4g} queries'
+                )
+        finally:
+            teardown_test_environment()
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'user': user.email,
+                'recipes': Recipe.objects.count(),
+                'repeat': options['repeat'],
+                'cold': options['cold'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(
+                results, options['baseline'], options['max_regression']
+            )
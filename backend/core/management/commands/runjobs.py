@@ -0,0 +1,66 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import claim_job, purge_jobs, run_job
+
+
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue.'
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds to wait when the queue is empty.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit when the queue is empty.'
+        )
+        parser.add_argument(
+            '--max-jobs', type=int,
+            help='Exit after running this many jobs.'
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def handle(self, *args, **options):
+        """Забирает задачи из очереди по одной до сигнала остановки.
+
+        Текущая задача при остановке выполняется до конца, но не дольше
+        JOB_TIMEOUT. Для обработки задач в несколько процессов
+        запускается несколько экземпляров команды.
+        """
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        processed = 0
+        purged_at = 0
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() - purged_at > PURGE_INTERVAL:
+                purge_jobs(settings.JOB_RETENTION_DAYS)
+                purged_at = time.monotonic()
+            job = claim_job()
+            if job is None:
+                if options['burst']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            run_job(job, timeout=settings.JOB_TIMEOUT)
+            processed += 1
+            self.stdout.write(
+                f'{job.name} #{job.pk}: {job.status} '
+                f'in {job.duration:.3f} s, attempt {job.attempts}'
+            )
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+        self.stdout.write(f'Processed {processed} jobs.')
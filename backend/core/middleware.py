@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+
+from core.db.routers import RoutingState, get_replicas, routing_state
+from core.instrumentation import RequestMetrics, request_metrics
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD')
+PIN_COOKIE = 'primary_db'
+
+
+def get_pin_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    digest = hashlib.sha256(authorization.encode()).hexdigest()
+    return f'replica_pin:{digest}'
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Разрешает чтение с реплик для запросов GET и HEAD.
+
+    После записи клиент REPLICA_PIN_SECONDS секунд читает с основной
+    базы, чтобы видеть свои изменения, пока реплики их догоняют.
+    Клиент узнаётся по заголовку Authorization или по cookie, которая
+    выставляется после записи без токена, например при входе.
+    """
+
+    def is_pinned(self, request):
+        if PIN_COOKIE in request.COOKIES:
+            return True
+        key = get_pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def pin(self, request, response):
+        key = get_pin_key(request)
+        if key is not None:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        else:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+
+    def process_request(self, request):
+        if not get_replicas():
+            return
+        request.routing_state = RoutingState(
+            use_replicas=(
+                request.method in SAFE_METHODS
+                and not self.is_pinned(request)
+            ),
+        )
+        routing_state.set(request.routing_state)
+
+    def process_response(self, request, response):
+        state = getattr(request, 'routing_state', None)
+        routing_state.set(None)
+        if state is None or response.status_code >= 400:
+            return response
+        if state.written or request.method not in SAFE_METHODS:
+            self.pin(request, response)
+        return response
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """Считает запросы к базе данных и время обработки запроса.
+
+    Итоги передаются в заголовке Server-Timing. Запрос дольше порога
+    его представления или с повторяющимися запросами к базе
+    записывается в журнал одной строкой JSON.
+    """
+
+    def process_request(self, request):
+        request.metrics = RequestMetrics()
+        request_metrics.set(request.metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.view_started = time.perf_counter()
+        request.metrics.view_name = request.resolver_match.view_name
+
+    @staticmethod
+    def get_server_timing(metrics, total, view):
+        timings = [
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries, '
+            f'{metrics.duplicates} duplicates"',
+        ]
+        if view is not None:
+            timings.append(f'view;dur={view:.1f}')
+        timings.append(f'total;dur={total:.1f}')
+        return ', '.join(timings)
+
+    @staticmethod
+    def is_slow(metrics, total):
+        threshold = settings.SLOW_REQUEST_THRESHOLDS.get(
+            metrics.view_name, settings.SLOW_REQUEST_THRESHOLD
+        )
+        return (
+            total > threshold
+            or metrics.duplicates >= settings.DUPLICATE_QUERIES_THRESHOLD
+        )
+
+    def process_response(self, request, response):
+        metrics = getattr(request, 'metrics', None)
+        request_metrics.set(None)
+        if metrics is None:
+            return response
+        finished = time.perf_counter()
+        total = (finished - metrics.started) * 1000
+        view = None
+        if metrics.view_started is not None:
+            view = (finished - metrics.view_started) * 1000
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = self.get_server_timing(
+                metrics, total, view
+            )
+        if self.is_slow(metrics, total):
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'view': metrics.view_name,
+                'status': response.status_code,
+                'total_ms': round(total, 1),
+                'view_ms': None if view is None else round(view, 1),
+                'db_ms': round(metrics.db_time * 1000, 1),
+                'queries': metrics.queries,
+                'duplicates': metrics.duplicates,
+                'duplicate_patterns': metrics.get_duplicate_patterns(),
+            }, ensure_ascii=False))
+        return response
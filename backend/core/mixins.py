@@ -0,0 +1,35 @@
+class CounterFieldsMixin:
+    """Не даёт сохранению модели перезаписать счётчики.
+
+    Поля из COUNTER_FIELDS меняются только запросами UPDATE,
+    а загруженные раньше значения могли устареть. При сохранении
+    существующей строки без update_fields они пропускаются и
+    сохраняются, только если явно указаны в update_fields.
+    Остальное поведение save не меняется: удалённая тем временем
+    строка вставляется заново, отложенные поля не загружаются.
+    """
+
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not self._state.adding:
+            deferred = self.get_deferred_fields()
+            if deferred:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.attname not in deferred
+                    and field.name not in self.COUNTER_FIELDS
+                ]
+        super().save(*args, **kwargs)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   *args, **kwargs):
+        if update_fields is None:
+            values = [
+                value for value in values
+                if value[0].name not in self.COUNTER_FIELDS
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, *args, **kwargs
+        )
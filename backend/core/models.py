@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Модель фоновой задачи."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        SUCCEEDED = 'succeeded', 'Выполнена'
+        FAILED = 'failed', 'Завершилась ошибкой'
+
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=settings.SHORT_FIELD_MAX_LENGHT,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        verbose_name='Пользователь',
+        null=True,
+        blank=True,
+    )
+    payload = models.JSONField(
+        verbose_name='Параметры',
+        default=dict,
+        blank=True,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=settings.SHORT_FIELD_MAX_LENGHT,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    result = models.JSONField(
+        verbose_name='Результат',
+        null=True,
+        blank=True,
+    )
+    file = models.FileField(
+        verbose_name='Файл результата',
+        upload_to='jobs/',
+        blank=True,
+    )
+    error = models.TextField(
+        verbose_name='Ошибка последней попытки',
+        blank=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попытки',
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+        default=3,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата постановки в очередь',
+        auto_now_add=True,
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Выполнить не раньше',
+        default=timezone.now,
+    )
+    started_at = models.DateTimeField(
+        verbose_name='Начало последней попытки',
+        null=True,
+        blank=True,
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='Завершение',
+        null=True,
+        blank=True,
+    )
+    duration = models.FloatField(
+        verbose_name='Длительность последней попытки, с',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'],
+                name='job_status_run_after_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} #{self.pk}: {self.status}'
@@ -0,0 +1,49 @@
+import json
+
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+ESTIMATE_THRESHOLD = 10000
+
+
+def get_estimated_count(queryset):
+    """Оценка количества строк запроса по плану PostgreSQL.
+
+    Запрос не выполняется, число строк берётся из статистики
+    планировщика, поэтому оценка может отличаться от точного значения.
+    Для запроса, который заведомо ничего не находит, например с пустым
+    списком в условии IN, возвращается ноль.
+    """
+    try:
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списков админки для больших таблиц.
+
+    На PostgreSQL точный COUNT выполняется только для небольших
+    выборок, для остальных количество страниц считается по оценке
+    планировщика.
+    """
+
+    estimate_threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor == 'postgresql':
+            estimate = get_estimated_count(queryset)
+            if estimate > self.estimate_threshold:
+                return estimate
+        return super().count
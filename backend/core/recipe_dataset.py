@@ -0,0 +1,271 @@
+import json
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache import INGREDIENTS_NAMESPACE, TAGS_NAMESPACE, bump_version
+from core.counters import recount
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+from users.models import User
+
+
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+TAG_FIELDS = ('name', 'color', 'slug')
+
+
+def batches(iterable, size):
+    """Разбивает последовательность на списки заданного размера."""
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+@contextmanager
+def open_stream(path, mode='r'):
+    """Открывает файл выгрузки, "-" означает стандартный ввод или вывод."""
+    if path == '-':
+        yield sys.stdout if 'w' in mode else sys.stdin
+        return
+    with open(path, mode, encoding='utf-8') as stream:
+        yield stream
+
+
+def parse_records(lines):
+    """Перебирает рецепты из непустых строк JSONL."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_recipe_batches(batch_size):
+    """Перебирает рецепты пачками по первичному ключу.
+
+    Каждая пачка загружается со связями отдельными запросами,
+    поэтому память не зависит от числа рецептов в базе.
+    """
+    recipes = Recipe.objects.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'ingredientrecipe_set',
+            queryset=IngredientRecipe.objects.select_related('ingredient')
+        ),
+    ).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(recipes.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def dump_recipe(recipe):
+    """Представление рецепта одной строкой JSONL."""
+    return json.dumps({
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'pub_date': recipe.pub_date.isoformat(),
+        'image': recipe.image.name,
+        'author': {
+            field: getattr(recipe.author, field) for field in AUTHOR_FIELDS
+        },
+        'tags': [
+            {field: getattr(tag, field) for field in TAG_FIELDS}
+            for tag in recipe.tags.all()
+        ],
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.ingredientrecipe_set.all()
+        ],
+    }, ensure_ascii=False) + '\n'
+
+
+def export_image(name, directory):
+    """Копирует изображение из хранилища в каталог выгрузки."""
+    target = Path(directory) / name
+    if not name or target.exists() or not default_storage.exists(name):
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with default_storage.open(name) as source, open(target, 'wb') as file:
+        shutil.copyfileobj(source, file)
+    return True
+
+
+def import_image(name, directory):
+    """Копирует изображение из каталога выгрузки в хранилище."""
+    source = Path(directory) / name
+    if not name or default_storage.exists(name) or not source.exists():
+        return False
+    with open(source, 'rb') as file:
+        default_storage.save(name, File(file))
+    return True
+
+
+@contextmanager
+def image_workers(workers):
+    """Функция отображения для копирования изображений.
+
+    При нескольких процессах соединения с базой закрываются до
+    запуска пула, чтобы дочерние процессы не делили их с основным.
+    """
+    if workers <= 1:
+        yield map
+        return
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield partial(executor.map, chunksize=64)
+
+
+def copy_images(mapper, copy, names, directory):
+    """Копирует изображения и возвращает количество скопированных."""
+    return sum(mapper(partial(copy, directory=directory), names))
+
+
+def load_authors(records):
+    """Возвращает авторов пачки по почте, создавая отсутствующих."""
+    authors = {
+        record['author']['email']: record['author'] for record in records
+    }
+    existing = User.objects.in_bulk(authors, field_name='email')
+    missing = [
+        User(password=make_password(None), **{
+            field: data.get(field, '') for field in AUTHOR_FIELDS
+        })
+        for email, data in authors.items() if email not in existing
+    ]
+    if not missing:
+        return existing
+    User.objects.bulk_create(missing, ignore_conflicts=True)
+    return User.objects.in_bulk(authors, field_name='email')
+
+
+def load_tags(records):
+    """Возвращает теги пачки по слагу, создавая отсутствующие."""
+    tags = {
+        tag['slug']: tag for record in records for tag in record['tags']
+    }
+    existing = Tag.objects.in_bulk(tags, field_name='slug')
+    missing = [
+        Tag(**{field: data[field] for field in TAG_FIELDS})
+        for slug, data in tags.items() if slug not in existing
+    ]
+    if not missing:
+        return existing, False
+    Tag.objects.bulk_create(missing, ignore_conflicts=True)
+    return Tag.objects.in_bulk(tags, field_name='slug'), True
+
+
+def load_ingredients(records):
+    """Возвращает ингредиенты пачки по названию, создавая отсутствующие.
+
+    Название ингредиента уникально, поэтому для существующего
+    ингредиента единица измерения из выгрузки не учитывается.
+    """
+    units = {
+        item['name']: item['measurement_unit']
+        for record in records for item in record['ingredients']
+    }
+    existing = Ingredient.objects.in_bulk(units, field_name='name')
+    missing = [
+        Ingredient(name=name, measurement_unit=unit)
+        for name, unit in units.items() if name not in existing
+    ]
+    if not missing:
+        return existing, False
+    Ingredient.objects.bulk_create(missing, ignore_conflicts=True)
+    return Ingredient.objects.in_bulk(units, field_name='name'), True
+
+
+def import_batch(records):
+    """Импортирует пачку рецептов в одной транзакции.
+
+    Рецепты с уже существующими названиями и рецепты, автора которых
+    не удалось создать, пропускаются, как и конфликтующие по
+    уникальным полям теги и ингредиенты. Возвращает импортированные
+    рецепты и признаки изменения каталогов тегов и ингредиентов.
+    """
+    records = list({record['name']: record for record in records}.values())
+    existing_names = set(Recipe.objects.filter(
+        name__in=[record['name'] for record in records]
+    ).values_list('name', flat=True))
+    records = [
+        record for record in records if record['name'] not in existing_names
+    ]
+    if not records:
+        return [], False, False
+    with transaction.atomic():
+        authors = load_authors(records)
+        tags, tags_created = load_tags(records)
+        ingredients, ingredients_created = load_ingredients(records)
+        records = [
+            record for record in records
+            if record['author']['email'] in authors
+        ]
+        recipes = [
+            Recipe(
+                author=authors[record['author']['email']],
+                name=record['name'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+                image=record['image'],
+            )
+            for record in records
+        ]
+        Recipe.objects.bulk_create(recipes)
+        pks = dict(Recipe.objects.filter(
+            name__in=[recipe.name for recipe in recipes]
+        ).values_list('name', 'pk'))
+        # Дата публикации с auto_now_add при вставке заменяется текущей,
+        # исходная дата проставляется отдельным массовым обновлением.
+        now = timezone.now()
+        for recipe, record in zip(recipes, records):
+            recipe.pk = pks[recipe.name]
+            pub_date = parse_datetime(record.get('pub_date') or '')
+            recipe.pub_date = pub_date or now
+        Recipe.objects.bulk_update(recipes, ['pub_date'])
+        recount('recipes', pk__in={recipe.author_id for recipe in recipes})
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag=tags[slug])
+            for recipe, record in zip(recipes, records)
+            for slug in {tag['slug'] for tag in record['tags']}
+            if slug in tags
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for recipe, record in zip(recipes, records)
+            for ingredient, amount in {
+                ingredients[item['name']]: item['amount']
+                for item in record['ingredients']
+                if item['name'] in ingredients
+            }.items()
+        )
+    return recipes, tags_created, ingredients_created
+
+
+def bump_catalog_versions(tags_changed, ingredients_changed):
+    """Сбрасывает версии каталогов после массовой загрузки."""
+    if tags_changed:
+        bump_version(TAGS_NAMESPACE)
+    if ingredients_changed:
+        bump_version(INGREDIENTS_NAMESPACE)
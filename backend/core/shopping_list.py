@@ -0,0 +1,172 @@
+from django.db import connections, router
+
+from recipes.models import Cart, IngredientRecipe, ShoppingListItem
+
+
+TABLES = {
+    'item': ShoppingListItem._meta.db_table,
+    'cart': Cart._meta.db_table,
+    'ingredient_recipe': IngredientRecipe._meta.db_table,
+}
+ADD_SQL = '''
+    INSERT INTO {item} (user_id, ingredient_id, amount)
+    {source}
+    ON CONFLICT (user_id, ingredient_id)
+    DO UPDATE SET amount = {item}.amount + excluded.amount
+'''
+SUBTRACT_SQL = '''
+    UPDATE {item}
+    SET amount = CASE
+        WHEN {item}.amount > delta.amount THEN {item}.amount - delta.amount
+        ELSE 0
+    END
+    FROM ({source}) AS delta
+    WHERE {item}.user_id = delta.user_id
+    AND {item}.ingredient_id = delta.ingredient_id
+'''
+CLEANUP_SQL = 'DELETE FROM {item} WHERE {column} IN ({values}) AND amount = 0'
+RECIPE_SOURCE_SQL = '''
+    SELECT %s AS user_id, ingredient_id, SUM(amount) AS amount
+    FROM {ingredient_recipe}
+    WHERE recipe_id IN ({recipes})
+    GROUP BY ingredient_id
+'''
+CART_SOURCE_SQL = '''
+    SELECT cart.user_id AS user_id,
+           delta.ingredient_id AS ingredient_id,
+           delta.amount AS amount
+    FROM {cart} AS cart
+    CROSS JOIN ({values}) AS delta
+    WHERE cart.recipe_id = %s
+'''
+VALUES_SQL = 'SELECT %s AS ingredient_id, %s AS amount'
+REBUILD_SQL = '''
+    INSERT INTO {item} (user_id, ingredient_id, amount)
+    SELECT cart.user_id, ingredient_recipe.ingredient_id,
+           SUM(ingredient_recipe.amount)
+    FROM {cart} AS cart
+    JOIN {ingredient_recipe} AS ingredient_recipe
+    ON ingredient_recipe.recipe_id = cart.recipe_id
+    WHERE {where}
+    GROUP BY cart.user_id, ingredient_recipe.ingredient_id
+'''
+
+
+def iter_ingredients(user):
+    """Перебирает ингредиенты списка покупок пользователя по названию.
+
+    Возвращает кортежи из названия, единицы измерения и количества.
+    """
+    return ShoppingListItem.objects.filter(
+        user=user, amount__gt=0
+    ).values_list(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'amount'
+    ).order_by('ingredient__name').iterator()
+
+
+def placeholders(values):
+    """Возвращает перечень параметров запроса для списка значений."""
+    return ', '.join(['%s'] * len(values))
+
+
+def execute(sql, params):
+    """Выполняет запрос к таблице списков покупок."""
+    connection = connections[router.db_for_write(ShoppingListItem)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(**TABLES), params)
+
+
+def get_recipes_source(recipe_ids):
+    return RECIPE_SOURCE_SQL.replace(
+        '{recipes}', placeholders(recipe_ids)
+    ).format(**TABLES)
+
+
+def add_recipes(user_id, recipe_ids):
+    """Добавляет ингредиенты рецептов в список покупок пользователя."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    execute(
+        ADD_SQL.replace('{source}', get_recipes_source(recipe_ids)),
+        (user_id, *recipe_ids)
+    )
+
+
+def remove_recipes(user_id, recipe_ids):
+    """Убирает ингредиенты рецептов из списка покупок пользователя."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    execute(
+        SUBTRACT_SQL.replace('{source}', get_recipes_source(recipe_ids)),
+        (user_id, *recipe_ids)
+    )
+    execute(
+        CLEANUP_SQL.replace('{column}', 'user_id').replace('{values}', '%s'),
+        (user_id,)
+    )
+
+
+def add_recipe(user_id, recipe_id):
+    """Добавляет ингредиенты рецепта в список покупок пользователя."""
+    add_recipes(user_id, [recipe_id])
+
+
+def remove_recipe(user_id, recipe_id):
+    """Убирает ингредиенты рецепта из списка покупок пользователя."""
+    remove_recipes(user_id, [recipe_id])
+
+
+def change_ingredients(recipe_id, deltas):
+    """Применяет изменение ингредиентов рецепта к спискам покупок.
+
+    Принимает словарь приращений количества по ключу ингредиента
+    и обновляет списки покупок всех пользователей с этим рецептом.
+    """
+    for sign, sql in ((1, ADD_SQL), (-1, SUBTRACT_SQL)):
+        changes = [
+            (ingredient_id, delta * sign)
+            for ingredient_id, delta in deltas.items() if delta * sign > 0
+        ]
+        if not changes:
+            continue
+        source = CART_SOURCE_SQL.replace(
+            '{values}', ' UNION ALL '.join([VALUES_SQL] * len(changes))
+        ).format(**TABLES)
+        params = [value for change in changes for value in change]
+        execute(sql.replace('{source}', source), (*params, recipe_id))
+        if sign < 0:
+            ingredient_ids = [ingredient_id for ingredient_id, _ in changes]
+            execute(
+                CLEANUP_SQL.replace('{column}', 'ingredient_id').replace(
+                    '{values}', placeholders(ingredient_ids)
+                ),
+                ingredient_ids
+            )
+
+
+def rebuild(user_ids=None):
+    """Пересчитывает списки покупок по содержимому корзин.
+
+    Без списка пользователей пересчитывается вся таблица.
+    """
+    items = ShoppingListItem.objects.using(
+        router.db_for_write(ShoppingListItem)
+    )
+    if user_ids is None:
+        items.all().delete()
+        execute(REBUILD_SQL.replace('{where}', 'TRUE'), ())
+        return
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    items.filter(user_id__in=user_ids).delete()
+    execute(
+        REBUILD_SQL.replace(
+            '{where}', f'cart.user_id IN ({placeholders(user_ids)})'
+        ),
+        user_ids
+    )
@@ -0,0 +1,45 @@
+import csv
+import json
+
+from core.shopping_list import iter_ingredients
+
+
+class Echo:
+    """Буфер, возвращающий записанную строку вместо её хранения."""
+
+    def write(self, value):
+        return value
+
+
+def stream_txt(user):
+    """Выгружает список покупок построчно в текстовом формате."""
+    yield 'Список покупок\n\n'
+    for name, unit, amount in iter_ingredients(user):
+        yield f'{name} ({unit}) — {amount}\n'
+
+
+def stream_csv(user):
+    """Выгружает список покупок построчно в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for row in iter_ingredients(user):
+        yield writer.writerow(row)
+
+
+def stream_json(user):
+    """Выгружает список покупок массивом JSON по одному элементу."""
+    separator = '['
+    for name, unit, amount in iter_ingredients(user):
+        yield separator + json.dumps(
+            {'name': name, 'measurement_unit': unit, 'amount': amount},
+            ensure_ascii=False
+        )
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
+EXPORTERS = {
+    'txt': stream_txt,
+    'csv': stream_csv,
+    'json': stream_json,
+}
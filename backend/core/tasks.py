@@ -0,0 +1,38 @@
+from uuid import uuid4
+
+from django.core.files.base import ContentFile
+
+from core.creation_pdf import make_shopping_cart
+from core.images import update_recipe_variants
+from core.jobs import task
+from recipes.models import Recipe
+
+
+SHOPPING_CART_PDF = 'shopping_cart_pdf'
+RECIPE_IMAGE_VARIANTS = 'recipe_image_variants'
+
+
+@task(SHOPPING_CART_PDF)
+def shopping_cart_pdf(job):
+    """Формирует PDF списка покупок пользователя задачи.
+
+    Имя файла случайное, чтобы ссылку на чужой список нельзя
+    было подобрать.
+    """
+    content = make_shopping_cart(job.user)
+    job.file.save(f'{uuid4().hex}.pdf', ContentFile(content), save=False)
+    return {'size': len(content)}
+
+
+@task(RECIPE_IMAGE_VARIANTS)
+def recipe_image_variants(job, recipe_id, image):
+    """Создаёт уменьшенные варианты изображения рецепта.
+
+    Если изображение рецепта уже заменено, задача ничего не делает:
+    варианты нового изображения создаст следующая задача.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or recipe.image.name != image:
+        return {'skipped': True}
+    update_recipe_variants(recipe)
+    return {'variants': recipe.image_variants}
@@ -0,0 +1,121 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+TOKEN_KEY_TEMPLATE = 'auth:token:{}'
+
+
+class LocalTTLCache:
+    """LRU-кеш процесса с ограниченным временем жизни записей.
+
+    Хранит не больше maxsize записей, при переполнении вытесняются
+    давно не использованные. Доступ из потоков защищён блокировкой.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.ttl)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+local_tokens = LocalTTLCache(
+    settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_TTL
+)
+
+
+def get_token_cache_key(key):
+    """Ключ кеша токена; сам токен в ключ не попадает."""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return TOKEN_KEY_TEMPLATE.format(digest)
+
+
+def copy_token(token):
+    """Копия токена с отдельной копией пользователя.
+
+    Запрос может менять request.user, поэтому закешированный
+    объект никогда не выдаётся напрямую. Счётчики пользователя
+    в копию не попадают и при обращении загружаются из базы данных,
+    чтобы из кеша не выдавались устаревшие значения.
+    """
+    token = copy.copy(token)
+    token.user = copy.copy(token.user)
+    for field in token.user.COUNTER_FIELDS:
+        token.user.__dict__.pop(field, None)
+    return token
+
+
+def get_cached_token(key):
+    """Токен с пользователем из кеша процесса или общего кеша."""
+    cache_key = get_token_cache_key(key)
+    token = local_tokens.get(cache_key)
+    if token is None and settings.AUTH_TOKEN_CACHE_TTL:
+        token = cache.get(cache_key)
+        if token is not None:
+            local_tokens.set(cache_key, token)
+    if token is None:
+        return None
+    return copy_token(token)
+
+
+def cache_token(token):
+    """Сохраняет токен с пользователем в кеш процесса и общий кеш."""
+    cache_key = get_token_cache_key(token.key)
+    token = copy_token(token)
+    local_tokens.set(cache_key, token)
+    if settings.AUTH_TOKEN_CACHE_TTL:
+        cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TTL)
+
+
+def invalidate_tokens(keys):
+    """Удаляет токены из кешей после фиксации транзакции.
+
+    Кеши других процессов очищаются только по истечении
+    AUTH_TOKEN_LOCAL_TTL, поэтому это время должно быть небольшим.
+    """
+    cache_keys = [get_token_cache_key(key) for key in keys]
+    if not cache_keys:
+        return
+
+    def delete():
+        local_tokens.delete_many(cache_keys)
+        cache.delete_many(cache_keys)
+
+    transaction.on_commit(delete)
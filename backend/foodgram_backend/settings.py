@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -16,7 +17,7 @@ load_dotenv()
 SECRET_KEY = os.getenv('SECRET_KEY', 'django_secret_key')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv('DEBUG')
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1, localhost').split(',')
 
@@ -29,18 +30,19 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'core.apps.CoreConfig',
-    'debug_toolbar',
     'django_filters',
     'colorfield'
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,9 +50,33 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
+# В режиме ASGI маршруты чтения API выполняются в пуле потоков,
+# режим включает foodgram_backend/asgi.py.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+ASYNC_VIEW_THREADS = int(os.getenv('ASYNC_VIEW_THREADS', 16))
+
+# Панель отладки подключается только при DEBUG. В режиме ASGI её
+# синхронный middleware перевёл бы весь запрос в синхронный режим.
+if DEBUG and not ASYNC_VIEWS:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
+# Заголовок Server-Timing и журнал медленных запросов. Заголовок
+# раскрывает клиентам число запросов к базе и время их выполнения,
+# поэтому по умолчанию выдаётся только в режиме отладки. Пороги в мс
+# для отдельных представлений задаются JSON вида {"recipes-list": 200}.
+SERVER_TIMING = os.getenv('SERVER_TIMING', str(DEBUG)) == 'True'
+SLOW_REQUEST_THRESHOLD = int(os.getenv('SLOW_REQUEST_THRESHOLD', 500))
+SLOW_REQUEST_THRESHOLDS = json.loads(
+    os.getenv('SLOW_REQUEST_THRESHOLDS', '{}')
+)
+DUPLICATE_QUERIES_THRESHOLD = int(
+    os.getenv('DUPLICATE_QUERIES_THRESHOLD', 5)
+)
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -79,19 +105,89 @@ WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Соединения живут CONN_MAX_AGE секунд и проверяются перед повторным
+# использованием. При DB_POOL_SIZE потоки процесса берут соединения
+# из общего пула и возвращают их в конце каждого запроса.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django_user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'mysecretpassword'),
         'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_SIZE else int(os.getenv('CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'POOL_MAX_IDLE': int(os.getenv('DB_POOL_MAX_IDLE', 300)),
     }
 }
 
+# Реплики для чтения запросов GET и HEAD задаются списком хостов
+# через запятую, остальные параметры берутся у основной базы.
+for number, host in enumerate(filter(None, os.getenv(
+    'DB_REPLICA_HOSTS', ''
+).split(','))):
+    host, _, port = host.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+REPLICA_CHECK_INTERVAL = int(os.getenv('REPLICA_CHECK_INTERVAL', 5))
+REPLICA_MAX_LAG = int(os.getenv('REPLICA_MAX_LAG', 10))
+
 AUTH_USER_MODEL = 'users.User'
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', '/tmp/foodgram_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+    # Версии данных хранятся отдельно от основного кеша: их немного,
+    # поэтому здесь не срабатывает вытеснение при MAX_ENTRIES.
+    'versions': {
+        'BACKEND': os.getenv(
+            'VERSION_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'VERSION_CACHE_LOCATION', '/tmp/foodgram_cache/versions'
+        ),
+        'TIMEOUT': None,
+    },
+}
+
+SHOPPING_CART_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_CART_CACHE_TIMEOUT', 60 * 60 * 24)
+)
+RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RESPONSE_CACHE_TIMEOUT', 60 * 60 * 24 * 7)
+)
+RECIPE_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_CACHE_TIMEOUT', 60 * 60 * 24 * 7)
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -132,8 +228,25 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/app/media/'
+IMAGE_UPLOAD_MAX_SIZE = int(
+    os.getenv('IMAGE_UPLOAD_MAX_SIZE', 5 * 1024 * 1024)
+)
+# Изображение приходит в теле JSON строкой base64, она на треть длиннее
+# файла. Остальные поля рецепта укладываются в запас в 1 МБ, иначе
+# тело запроса отклонялось бы раньше проверки размера изображения.
+DATA_UPLOAD_MAX_MEMORY_SIZE = IMAGE_UPLOAD_MAX_SIZE * 4 // 3 + 1024 * 1024
+RECIPE_IMAGE_VARIANTS = {
+    'card': 480,
+    'detail': 1280,
+}
 CSV_FILES_DIR = 'data'
 
+# Background jobs
+JOBS_RUN_INLINE = os.getenv('JOBS_RUN_INLINE', 'False') == 'True'
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', 60 * 10))
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', 10))
+JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', 7))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -145,7 +258,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
@@ -153,6 +266,12 @@ REST_FRAMEWORK = {
 
 }
 
+# Кеш токенов аутентификации: в процессе на AUTH_TOKEN_LOCAL_TTL секунд,
+# в общем кеше на AUTH_TOKEN_CACHE_TTL секунд (0 отключает кеш).
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv('AUTH_TOKEN_LOCAL_TTL', 10))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 300))
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'PERMISSIONS': {
@@ -174,3 +293,20 @@ USER_FIELD_MAX_LENGHT = 150
 EMAIL_FIELD_MAX_LENGHT = 254
 SHORT_FIELD_MAX_LENGHT = 50
 MIN_AMOUNT = 1
+RECIPE_BATCH_MAX_SIZE = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL', 'INFO'),
+        },
+    },
+}
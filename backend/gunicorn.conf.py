@@ -0,0 +1,29 @@
+"""Настройки gunicorn для синхронного и асинхронного режимов.
+
+Режим выбирается переменной SERVER_MODE: wsgi — синхронные
+процессы, asgi — процессы uvicorn, в которых маршруты чтения
+API выполняются в пуле потоков ASYNC_VIEW_THREADS.
+"""
+
+import multiprocessing
+import os
+
+server_mode = os.getenv('SERVER_MODE', 'wsgi')
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+if server_mode == 'asgi':
+    wsgi_app = 'foodgram_backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # Каждый процесс обслуживает много соединений, поэтому процессов
+    # нужно не больше, чем ядер.
+    workers = int(os.getenv('GUNICORN_WORKERS', cpu_count))
+else:
+    wsgi_app = 'foodgram_backend.wsgi:application'
+    worker_class = 'sync'
+    workers = int(os.getenv('GUNICORN_WORKERS', cpu_count * 2 + 1))
@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.db.models import Q
 
+from core.paginators import EstimatedCountPaginator
 from recipes.forms import IngredientRecipeFormSet, TagRecipeFormSet
 from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+from users.models import User
 
 
 @admin.register(Ingredient)
@@ -53,6 +56,34 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     empty_value_display = '-пусто-'
     inlines = (IngredientRecipeInline, TagRecipeInline)
+    list_select_related = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Подгружает теги и ингредиенты страницы двумя запросами."""
+        return super().get_queryset(request).prefetch_related(
+            'tags', 'ingredients'
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет рецепты по названию, автору и тегам.
+
+        Автор и теги проверяются подзапросами, а не соединениями,
+        поэтому строки рецептов не повторяются и DISTINCT не нужен.
+        Каждое слово запроса должно найтись в одном из полей.
+        """
+        for term in search_term.split():
+            queryset = queryset.filter(
+                Q(name__icontains=term)
+                | Q(author__in=User.objects.filter(
+                    username__icontains=term
+                ).values('pk'))
+                | Q(pk__in=TagRecipe.objects.filter(
+                    tag__name__icontains=term
+                ).values('recipe'))
+            )
+        return queryset, False
 
     def get_tags(self, recipe):
         return ', '.join(
@@ -65,11 +96,12 @@ class RecipeAdmin(admin.ModelAdmin):
         )
 
     def get_favorites(self, recipe):
-        return recipe.in_favorites.count()
+        return recipe.favorites_count
 
     get_tags.short_description = 'Теги'
     get_ingredients.short_description = 'Ингредиенты'
     get_favorites.short_description = 'В избранных'
+    get_favorites.admin_order_field = 'favorites_count'
 
 
 admin.site.register(Tag)
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:26
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.db.operations import RunPostgresSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        RunPostgresSQL(
+            'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+            'ON recipes_recipe USING gin (('
+            "setweight(to_tsvector('russian'::regconfig, "
+            "COALESCE(name, '')), 'A') || "
+            "setweight(to_tsvector('russian'::regconfig, "
+            "COALESCE(text, '')), 'B')))",
+            'DROP INDEX IF EXISTS recipe_search_vector_idx',
+        ),
+        RunPostgresSQL(
+            'CREATE INDEX IF NOT EXISTS recipe_name_trgm_idx '
+            'ON recipes_recipe USING gin (name gin_trgm_ops)',
+            'DROP INDEX IF EXISTS recipe_name_trgm_idx',
+        ),
+    ]
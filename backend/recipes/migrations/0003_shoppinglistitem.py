@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FILL_SHOPPING_LISTS_SQL = '''
+    INSERT INTO recipes_shoppinglistitem (user_id, ingredient_id, amount)
+    SELECT cart.user_id, ingredient_recipe.ingredient_id,
+           SUM(ingredient_recipe.amount)
+    FROM recipes_cart AS cart
+    JOIN recipes_ingredientrecipe AS ingredient_recipe
+    ON ingredient_recipe.recipe_id = cart.recipe_id
+    GROUP BY cart.user_id, ingredient_recipe.ingredient_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0002_recipe_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент списка покупок',
+                'verbose_name_plural': 'Ингредиенты списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item'),
+        ),
+        migrations.RunSQL(FILL_SHOPPING_LISTS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+from core.db.operations import RunPostgresSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_counters'),
+    ]
+
+    operations = [
+        RunPostgresSQL(
+            'CREATE INDEX IF NOT EXISTS recipe_name_upper_trgm_idx '
+            'ON recipes_recipe USING gin (UPPER(name) gin_trgm_ops)',
+            'DROP INDEX IF EXISTS recipe_name_upper_trgm_idx',
+        ),
+    ]
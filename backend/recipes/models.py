@@ -1,11 +1,20 @@
 from colorfield.fields import ColorField
 from django.conf import settings
+from django.contrib.postgres.search import SearchVector
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from core.mixins import CounterFieldsMixin
 from users.models import User
 
 
+SEARCH_CONFIG = 'russian'
+RECIPE_SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+)
+
+
 class Tag(models.Model):
     """Модель тега."""
 
@@ -66,7 +75,7 @@ class Ingredient(models.Model):
         return f'{self.name}'
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецепта."""
 
     author = models.ForeignKey(
@@ -91,11 +100,27 @@ class Recipe(models.Model):
         blank=False,
         default=None
     )
+    image_variants = models.JSONField(
+        verbose_name='Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         auto_now_add=True,
         editable=False,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия данных рецепта',
+        default=0,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
         null=False,
@@ -127,10 +152,27 @@ class Recipe(models.Model):
         ),
     )
 
+    # Версия меняется вместе со счётчиком запросом UPDATE и не должна
+    # откатываться сохранением загруженного раньше рецепта.
+    COUNTER_FIELDS = ('favorites_count', 'version')
+
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ("-pub_date",)
+        # GIN-индексы полнотекстового и триграммного поиска создаются
+        # SQL-миграциями только на PostgreSQL и в состояние моделей
+        # не входят, иначе SQLite не смог бы пересоздать таблицу.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.name}'
@@ -238,3 +280,41 @@ class Cart(BaseListModel):
                 fields=['user', 'recipe'], name='unique_cart'
             )
         ]
+
+
+class ShoppingListItem(models.Model):
+    """Суммарное количество ингредиента в списке покупок пользователя.
+
+    Поддерживается приращениями при изменении списка покупок
+    и ингредиентов рецептов, находящихся в списках покупок.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        related_name='shopping_list',
+        on_delete=models.CASCADE,
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        related_name='shopping_list_items',
+        on_delete=models.CASCADE,
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user.username}: {self.ingredient.name}'
@@ -0,0 +1,131 @@
+from collections import defaultdict
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from core import shopping_list
+from core.cache import (INGREDIENTS_NAMESPACE, TAGS_NAMESPACE, bump_version,
+                        invalidate_recipes)
+from core.counters import change_counter
+from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
+                            Recipe, Tag, TagRecipe)
+from users.models import User
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    """Сбрасывает версию ингредиентов при изменении каталога."""
+    bump_version(INGREDIENTS_NAMESPACE)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    """Сбрасывает версию тегов при их изменении."""
+    bump_version(TAGS_NAMESPACE)
+
+
+@receiver(post_save, sender=Cart)
+def cart_added(instance, created, **kwargs):
+    """Добавляет ингредиенты рецепта в список покупок."""
+    if created:
+        shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=Cart)
+def cart_deleted(instance, **kwargs):
+    """Убирает ингредиенты рецепта из списка покупок."""
+    shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(instance, created, **kwargs):
+    """Увеличивает счётчик добавлений рецепта в избранное."""
+    if created:
+        change_counter('favorites', instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(instance, **kwargs):
+    """Уменьшает счётчик добавлений рецепта в избранное."""
+    change_counter('favorites', instance.recipe_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_added(instance, created, **kwargs):
+    """Увеличивает счётчик рецептов автора."""
+    if created:
+        change_counter('recipes', instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(instance, **kwargs):
+    """Уменьшает счётчик рецептов автора."""
+    change_counter('recipes', instance.author_id, -1)
+
+
+@receiver(pre_save, sender=IngredientRecipe)
+def ingredient_recipe_saving(instance, **kwargs):
+    """Запоминает прежние ингредиент и количество в рецепте."""
+    instance.previous_amount = None
+    if instance.pk is not None:
+        instance.previous_amount = IngredientRecipe.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient_id', 'amount').first()
+
+
+@receiver(post_save, sender=IngredientRecipe)
+def ingredient_recipe_saved(instance, **kwargs):
+    """Переносит изменение ингредиента рецепта в списки покупок."""
+    deltas = defaultdict(int)
+    previous_amount = getattr(instance, 'previous_amount', None)
+    if previous_amount is not None:
+        ingredient_id, amount = previous_amount
+        deltas[ingredient_id] -= amount
+    deltas[instance.ingredient_id] += instance.amount
+    shopping_list.change_ingredients(instance.recipe_id, deltas)
+
+
+@receiver(post_delete, sender=IngredientRecipe)
+def ingredient_recipe_deleted(instance, **kwargs):
+    """Убирает удалённый ингредиент рецепта из списков покупок."""
+    shopping_list.change_ingredients(
+        instance.recipe_id, {instance.ingredient_id: -instance.amount}
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(instance, created, **kwargs):
+    """Сбрасывает кеш изменённого рецепта."""
+    if not created:
+        invalidate_recipes([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver((post_save, post_delete), sender=TagRecipe)
+def recipe_relation_changed(instance, **kwargs):
+    """Сбрасывает кеш рецепта при изменении его ингредиентов и тегов."""
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=TagRecipe)
+def recipe_tags_changed(instance, action, reverse, pk_set, **kwargs):
+    """Сбрасывает кеш рецептов при изменении тегов через связь."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_recipes([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_recipes(instance.recipes.values_list('pk', flat=True))
+    else:
+        invalidate_recipes(pk_set)
+
+
+@receiver(post_save, sender=User)
+def author_changed(instance, update_fields, **kwargs):
+    """Сбрасывает кеш рецептов автора при изменении его данных."""
+    if update_fields is not None and not AUTHOR_FIELDS & set(update_fields):
+        return
+    invalidate_recipes(instance.recipes.values_list('pk', flat=True))
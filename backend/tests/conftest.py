@@ -0,0 +1,98 @@
+import pytest
+from django.core.cache import caches
+
+from core.token_cache import local_tokens
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from tests.utils import get_client
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+    local_tokens.clear()
+
+
+@pytest.fixture
+def users(db):
+    return [
+        User.objects.create_user(
+            email=f'user{number}@example.com',
+            username=f'user{number}',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password',
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def user(users):
+    return users[0]
+
+
+@pytest.fixture
+def author(users):
+    return users[1]
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(
+            name=f'Тег {number}', color=f'#00000{number}', slug=f'tag{number}'
+        )
+        for number in range(2)
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(
+            name=f'Ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(5)
+    ]
+
+
+@pytest.fixture
+def recipes(author, tags, ingredients):
+    recipes = []
+    for number in range(3):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=f'Рецепт {number}',
+            image='recipes/images/recipe.png',
+            text='Описание',
+            cooking_time=10,
+        )
+        recipe.tags.set(tags)
+        for position, ingredient in enumerate(ingredients[:number + 2]):
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=10 + position
+            )
+        recipes.append(recipe)
+    return recipes
+
+
+@pytest.fixture
+def recipe(recipes):
+    return recipes[0]
+
+
+@pytest.fixture
+def anonymous_client():
+    return get_client()
+
+
+@pytest.fixture
+def user_client(user):
+    return get_client(user)
+
+
+@pytest.fixture
+def author_client(author):
+    return get_client(author)
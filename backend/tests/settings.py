@@ -0,0 +1,25 @@
+import tempfile
+
+from foodgram_backend.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'versions',
+        'TIMEOUT': None,
+    },
+}
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,25 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.async_views import async_view
+
+
+def record_thread(request):
+    return HttpResponse(threading.current_thread().name)
+
+
+@pytest.mark.parametrize('method, in_pool', [
+    ('get', True),
+    ('head', True),
+    ('post', False),
+    ('patch', False),
+    ('delete', False),
+])
+def test_only_reads_use_pool(method, in_pool):
+    request = getattr(RequestFactory(), method)('/')
+    response = async_to_sync(async_view(record_thread))(request)
+    assert response.content.decode().startswith('view') is in_pool
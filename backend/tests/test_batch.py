@@ -0,0 +1,92 @@
+import pytest
+from django.conf import settings
+
+from recipes.models import Cart, Favorite, Recipe
+from tests.utils import assert_consistent
+
+MISSING_PK = 10 ** 6
+FAVORITE_URL = '/api/recipes/favorite/batch/'
+CART_URL = '/api/recipes/shopping_cart/batch/'
+
+
+def send(client, method, url, ids):
+    return getattr(client, method)(url, {'recipes': ids}, format='json')
+
+
+def get_statuses(response):
+    assert response.status_code == 200, response.json()
+    return [(item['id'], item['status']) for item in response.json()[
+        'results'
+    ]]
+
+
+@pytest.mark.parametrize('url, model', [
+    (FAVORITE_URL, Favorite),
+    (CART_URL, Cart),
+])
+def test_mixed_batch(user, user_client, recipes, url, model):
+    first, second, third = (recipe.pk for recipe in recipes)
+    model.objects.create(user=user, recipe_id=first)
+    response = send(
+        user_client, 'post', url, [first, second, MISSING_PK, second]
+    )
+    assert get_statuses(response) == [
+        (first, 'exists'), (second, 'added'), (MISSING_PK, 'not_found'),
+    ]
+    assert set(model.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    )) == {first, second}
+    response = send(
+        user_client, 'delete', url, [third, first, MISSING_PK, first]
+    )
+    assert get_statuses(response) == [
+        (third, 'absent'), (first, 'removed'), (MISSING_PK, 'not_found'),
+    ]
+    assert list(model.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    )) == [second]
+
+
+def test_favorite_batch_counters(user_client, recipes):
+    ids = [recipe.pk for recipe in recipes]
+    send(user_client, 'post', FAVORITE_URL, ids + ids)
+    assert set(Recipe.objects.values_list('favorites_count', flat=True)) == {1}
+    send(user_client, 'post', FAVORITE_URL, ids)
+    assert set(Recipe.objects.values_list('favorites_count', flat=True)) == {1}
+    send(user_client, 'delete', FAVORITE_URL, ids[:2])
+    assert list(Recipe.objects.order_by('pk').values_list(
+        'favorites_count', flat=True
+    )) == [0, 0, 1]
+
+
+def test_cart_batch_shopping_list(user, user_client, recipes):
+    ids = [recipe.pk for recipe in recipes]
+    send(user_client, 'post', CART_URL, ids + [MISSING_PK])
+    assert_consistent(user)
+    send(user_client, 'delete', CART_URL, ids[1:])
+    assert_consistent(user)
+
+
+@pytest.mark.parametrize('url', [FAVORITE_URL, CART_URL])
+@pytest.mark.parametrize('ids', [
+    [],
+    [0],
+    list(range(1, settings.RECIPE_BATCH_MAX_SIZE + 2)),
+])
+def test_invalid_batch(user, user_client, recipes, url, ids):
+    response = send(user_client, 'post', url, ids)
+    assert response.status_code == 400
+    assert 'recipes' in response.json()
+    assert not Favorite.objects.filter(user=user).exists()
+    assert not Cart.objects.filter(user=user).exists()
+
+
+def test_max_size_batch(user_client, recipes):
+    ids = list(range(1, settings.RECIPE_BATCH_MAX_SIZE + 1))
+    statuses = get_statuses(send(user_client, 'post', FAVORITE_URL, ids))
+    assert len(statuses) == settings.RECIPE_BATCH_MAX_SIZE
+
+
+def test_anonymous(anonymous_client, recipe):
+    response = send(anonymous_client, 'post', FAVORITE_URL, [recipe.pk])
+    assert response.status_code == 401
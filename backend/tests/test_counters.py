@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.counters import change_counter
+from recipes.models import Favorite, Recipe
+from tests.utils import get_client
+from users.models import Follow, User
+
+
+def test_full_recipe_save_keeps_counters(user, recipe):
+    stale = Recipe.objects.get(pk=recipe.pk)
+    Favorite.objects.create(user=user, recipe=recipe)
+    change_counter('favorites', recipe.pk, 2)
+    version = Recipe.objects.get(pk=recipe.pk).version
+    stale.name = 'Новое название'
+    stale.save()
+    recipe.refresh_from_db()
+    assert recipe.name == 'Новое название'
+    assert recipe.favorites_count == 3
+    assert recipe.version > version
+
+
+def test_full_user_save_keeps_counters(users, author, recipe):
+    stale = User.objects.get(pk=author.pk)
+    Follow.objects.create(user=users[0], author=author)
+    change_counter('followers', author.pk, 1)
+    stale.first_name = 'Новое'
+    stale.save()
+    author.refresh_from_db()
+    assert author.first_name == 'Новое'
+    assert author.followers_count == 2
+    assert author.recipes_count == 3
+
+
+def test_explicit_update_fields_saves_counter(recipe):
+    recipe.favorites_count = 7
+    recipe.save(update_fields=['favorites_count'])
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 7
+
+
+def test_counters_follow_relations(user, user_client, author, recipe):
+    url = f'/api/recipes/{recipe.pk}/favorite/'
+    assert user_client.post(url).status_code == 201
+    assert Recipe.objects.get(pk=recipe.pk).favorites_count == 1
+    assert user_client.delete(url).status_code == 204
+    assert Recipe.objects.get(pk=recipe.pk).favorites_count == 0
+    Recipe.objects.filter(pk=recipe.pk).delete()
+    assert User.objects.get(pk=author.pk).recipes_count == 2
+
+
+def test_full_save_reinserts_deleted_row(db):
+    deleted = User.objects.create_user(
+        email='deleted@example.com', username='deleted', first_name='Имя',
+        last_name='Фамилия', password='password',
+    )
+    stale = User.objects.get(pk=deleted.pk)
+    User.objects.filter(pk=deleted.pk).delete()
+    stale.first_name = 'Вернулся'
+    stale.save()
+    assert User.objects.get(pk=deleted.pk).first_name == 'Вернулся'
+
+
+def test_save_does_not_load_deferred_fields(author, recipes):
+    partial = User.objects.only('pk', 'first_name').get(pk=author.pk)
+    partial.first_name = 'Новое'
+    with CaptureQueriesContext(connection) as context:
+        partial.save()
+    queries = [query['sql'] for query in context.captured_queries]
+    assert not any(
+        sql.startswith('SELECT') and 'users_user' in sql.split('FROM')[1]
+        for sql in queries if 'FROM' in sql
+    ), queries
+    update = next(sql for sql in queries if sql.startswith('UPDATE'))
+    assert 'first_name' in update and 'email' not in update
+    assert 'recipes_count' not in update
+    author.refresh_from_db()
+    assert author.first_name == 'Новое'
+    assert author.recipes_count == len(recipes)
+
+
+def test_password_change_keeps_followers(user, users, author):
+    author_client = get_client(author)
+    assert author_client.get('/api/users/me/').status_code == 200
+    Follow.objects.create(user=user, author=author)
+    response = author_client.post(
+        '/api/users/set_password/',
+        {'new_password': 'Новый-пароль-123', 'current_password': 'password'},
+        format='json',
+    )
+    assert response.status_code == 204, response.json()
+    author.refresh_from_db()
+    assert author.followers_count == 1
+    assert author.check_password('Новый-пароль-123')
@@ -0,0 +1,61 @@
+import base64
+import io
+import json
+
+from django.conf import settings
+from django.test import RequestFactory
+from PIL import Image
+
+
+def make_image(side=4):
+    buffer = io.BytesIO()
+    Image.new('RGB', (side, side), 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def get_payload(tags, ingredients, image):
+    return {
+        'name': 'Рецепт с изображением',
+        'text': 'Описание',
+        'cooking_time': 5,
+        'image': image,
+        'tags': [tag.pk for tag in tags],
+        'ingredients': [
+            {'id': ingredient.pk, 'amount': 10} for ingredient in ingredients
+        ],
+    }
+
+
+def test_max_size_image_fits_request_body(tags, ingredients):
+    content = b'0' * settings.IMAGE_UPLOAD_MAX_SIZE
+    image = 'data:image/png;base64,' + base64.b64encode(content).decode()
+    request = RequestFactory().post(
+        '/api/recipes/',
+        json.dumps(get_payload(tags, ingredients, image)),
+        content_type='application/json',
+    )
+    assert len(request.body) <= settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+
+
+def test_too_large_image_is_field_error(author_client, tags, ingredients,
+                                        settings):
+    image = make_image(side=64)
+    settings.IMAGE_UPLOAD_MAX_SIZE = 100
+    response = author_client.post(
+        '/api/recipes/',
+        get_payload(tags, ingredients, image),
+        format='json',
+    )
+    assert response.status_code == 400
+    assert 'image' in response.json()
+
+
+def test_image_upload(author_client, tags, ingredients):
+    response = author_client.post(
+        '/api/recipes/',
+        get_payload(tags, ingredients, make_image()),
+        format='json',
+    )
+    assert response.status_code == 201, response.json()
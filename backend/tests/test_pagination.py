@@ -0,0 +1,100 @@
+import base64
+import json
+
+import pytest
+from django.utils import timezone
+
+from recipes.models import Recipe
+from users.models import Follow, User
+
+
+def traverse(client, url):
+    """Проходит все страницы по ссылкам next и собирает id объектов."""
+    ids = []
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.json()
+        data = response.json()
+        assert 'count' not in data
+        ids += [item['id'] for item in data['results']]
+        url = data['next']
+        pages += 1
+    return ids, pages
+
+
+def make_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.fixture
+def same_time_recipes(author):
+    recipes = [
+        Recipe.objects.create(
+            author=author,
+            name=f'Рецепт {number}',
+            image='recipes/images/recipe.png',
+            text='Описание',
+            cooking_time=5,
+        )
+        for number in range(7)
+    ]
+    Recipe.objects.update(pub_date=timezone.now())
+    return recipes
+
+
+def test_recipes_cursor_breaks_ties_by_id(anonymous_client,
+                                          same_time_recipes):
+    ids, pages = traverse(anonymous_client, '/api/recipes/?cursor=&limit=3')
+    assert ids == sorted(
+        (recipe.pk for recipe in same_time_recipes), reverse=True
+    )
+    assert pages == 3
+
+
+def test_recipes_cursor_follows_pub_date(anonymous_client, author, recipes):
+    ids, _ = traverse(anonymous_client, '/api/recipes/?cursor=&limit=2')
+    assert ids == list(
+        Recipe.objects.order_by('-pub_date', '-id').values_list(
+            'pk', flat=True
+        )
+    )
+
+
+@pytest.mark.parametrize('cursor', [
+    'не-курсор',
+    make_cursor({'id': 1}),
+    make_cursor([1]),
+    make_cursor(['не дата', 1]),
+])
+def test_invalid_cursor(anonymous_client, recipes, cursor):
+    response = anonymous_client.get('/api/recipes/', {'cursor': cursor})
+    assert response.status_code == 404
+
+
+def test_cursor_with_search_is_rejected(anonymous_client, recipes):
+    response = anonymous_client.get(
+        '/api/recipes/', {'cursor': '', 'search': 'Рецепт'}
+    )
+    assert response.status_code == 400
+    assert 'cursor' in response.json()
+
+
+def test_subscriptions_cursor_by_id(user, user_client):
+    authors = [
+        User.objects.create_user(
+            email=f'author{number}@example.com',
+            username=f'author{number}',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password',
+        )
+        for number in range(5)
+    ]
+    for author in reversed(authors):
+        Follow.objects.create(user=user, author=author)
+    ids, pages = traverse(
+        user_client, '/api/users/subscriptions/?cursor=&limit=2'
+    )
+    assert ids == sorted(author.pk for author in authors)
+    assert pages == 3
@@ -0,0 +1,14 @@
+from core.paginators import EstimatedCountPaginator, get_estimated_count
+from recipes.models import Recipe
+
+
+def test_empty_queryset_estimate(recipes):
+    assert get_estimated_count(Recipe.objects.filter(pk__in=[])) == 0
+
+
+def test_empty_queryset_count(recipes):
+    paginator = EstimatedCountPaginator(
+        Recipe.objects.filter(pk__in=[]).order_by('pk'), 10
+    )
+    assert paginator.count == 0
+    assert paginator.num_pages == 1
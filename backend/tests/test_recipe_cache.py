@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeSerializer
+from recipes.models import IngredientRecipe, Recipe
+
+
+def get_recipe(client, recipe):
+    response = client.get(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_shared_part_is_cached(anonymous_client, recipe):
+    get_recipe(anonymous_client, recipe)
+    with CaptureQueriesContext(connection) as context:
+        get_recipe(anonymous_client, recipe)
+    assert not any(
+        'recipes_ingredientrecipe' in query['sql']
+        for query in context.captured_queries
+    )
+
+
+def test_write_bumps_version(anonymous_client, author_client, recipe, tags):
+    get_recipe(anonymous_client, recipe)
+    version = Recipe.objects.get(pk=recipe.pk).version
+    item = IngredientRecipe.objects.filter(recipe=recipe).first()
+    response = author_client.patch(
+        f'/api/recipes/{recipe.pk}/',
+        {
+            'name': 'Новое название',
+            'tags': [tags[0].pk],
+            'ingredients': [{'id': item.ingredient_id, 'amount': 99}],
+        },
+        format='json',
+    )
+    assert response.status_code == 200
+    assert Recipe.objects.get(pk=recipe.pk).version > version
+    data = get_recipe(anonymous_client, recipe)
+    assert data['name'] == 'Новое название'
+    assert len(data['tags']) == 1
+    assert data['ingredients'][0]['amount'] == 99
+
+
+def test_stale_reader_does_not_poison_cache(anonymous_client, recipe):
+    stale = Recipe.objects.get(pk=recipe.pk)
+    Recipe.objects.filter(pk=recipe.pk).update(name='Новое название')
+    updated = Recipe.objects.get(pk=recipe.pk)
+    updated.save(update_fields=['name'])
+    request = APIRequestFactory().get('/')
+    request.user = recipe.author
+    stale_data = RecipeSerializer(stale, context={'request': request}).data
+    assert stale_data['name'] == recipe.name
+    assert get_recipe(anonymous_client, recipe)['name'] == 'Новое название'
@@ -0,0 +1,91 @@
+import pytest
+
+from recipes.models import Cart, Favorite, Recipe
+from tests.utils import assert_consistent
+from users.models import Follow, User
+
+MISSING_PK = 10 ** 6
+
+
+def favorite_url(pk):
+    return f'/api/recipes/{pk}/favorite/'
+
+
+def cart_url(pk):
+    return f'/api/recipes/{pk}/shopping_cart/'
+
+
+def subscribe_url(pk):
+    return f'/api/users/{pk}/subscribe/'
+
+
+@pytest.mark.parametrize('get_url', [favorite_url, cart_url])
+def test_recipe_relation_statuses(user_client, recipe, get_url):
+    url = get_url(recipe.pk)
+    response = user_client.post(url)
+    assert response.status_code == 201
+    assert response.json()['id'] == recipe.pk
+    response = user_client.post(url)
+    assert response.status_code == 400
+    assert response.json() == {'error': 'Объект уже существует.'}
+    assert user_client.delete(url).status_code == 204
+    response = user_client.delete(url)
+    assert response.status_code == 400
+    assert response.json() == {'error': 'Объект не найден.'}
+
+
+@pytest.mark.parametrize('get_url', [favorite_url, cart_url, subscribe_url])
+@pytest.mark.parametrize('method', ['post', 'delete'])
+def test_missing_target(user_client, get_url, method):
+    response = getattr(user_client, method)(get_url(MISSING_PK))
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('get_url', [favorite_url, cart_url, subscribe_url])
+def test_anonymous(anonymous_client, recipe, get_url):
+    assert anonymous_client.post(get_url(recipe.pk)).status_code == 401
+
+
+def test_favorite_counter(user, user_client, recipe):
+    url = favorite_url(recipe.pk)
+    user_client.post(url)
+    user_client.post(url)
+    assert Favorite.objects.filter(user=user, recipe=recipe).count() == 1
+    assert Recipe.objects.get(pk=recipe.pk).favorites_count == 1
+    user_client.delete(url)
+    user_client.delete(url)
+    assert Recipe.objects.get(pk=recipe.pk).favorites_count == 0
+
+
+def test_cart_shopping_list(user, user_client, recipes):
+    for recipe in recipes:
+        user_client.post(cart_url(recipe.pk))
+    user_client.post(cart_url(recipes[0].pk))
+    assert Cart.objects.filter(user=user).count() == len(recipes)
+    assert_consistent(user)
+    user_client.delete(cart_url(recipes[0].pk))
+    user_client.delete(cart_url(recipes[0].pk))
+    assert_consistent(user)
+
+
+def test_subscribe(user, user_client, author, recipes):
+    url = subscribe_url(author.pk)
+    response = user_client.post(url)
+    assert response.status_code == 201
+    assert response.json()['id'] == author.pk
+    assert response.json()['recipes_count'] == len(recipes)
+    assert User.objects.get(pk=author.pk).followers_count == 1
+    response = user_client.post(url)
+    assert response.status_code == 400
+    assert User.objects.get(pk=author.pk).followers_count == 1
+    assert user_client.delete(url).status_code == 204
+    assert user_client.delete(url).status_code == 400
+    assert User.objects.get(pk=author.pk).followers_count == 0
+
+
+def test_self_subscription_rejected(user, user_client):
+    response = user_client.post(subscribe_url(user.pk))
+    assert response.status_code == 400
+    assert 'errors' in response.json()
+    assert not Follow.objects.filter(user=user).exists()
+    assert User.objects.get(pk=user.pk).followers_count == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from recipes.models import Tag
+
+
+@pytest.fixture(autouse=True)
+def catalog(tags, ingredients):
+    pass
+
+
+def get_etag(client, url, params=''):
+    response = client.get(f'{url}{params}')
+    assert response.status_code == 200
+    return response['ETag']
+
+
+@pytest.mark.parametrize('url', ['/api/ingredients/', '/api/tags/'])
+def test_unknown_params_share_cache_entry(anonymous_client, url):
+    etag = get_etag(anonymous_client, url)
+    assert get_etag(anonymous_client, url, '?_=12345') == etag
+    assert get_etag(anonymous_client, url, '?utm=x&page=2') == etag
+
+
+def test_ingredient_params_ordered(anonymous_client):
+    url = '/api/ingredients/'
+    etag = get_etag(anonymous_client, url, '?name=&limit=2')
+    assert get_etag(anonymous_client, url, '?limit=2&name=&_=1') == etag
+    assert get_etag(anonymous_client, url, '?name=&limit=3') != etag
+
+
+def test_conditional_request(anonymous_client):
+    url = '/api/tags/'
+    etag = get_etag(anonymous_client, url)
+    response = anonymous_client.get(
+        f'{url}?nocache=1', HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 304
+    Tag.objects.create(name='Новый', color='#FFFFFF', slug='new')
+    response = anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert len(response.json()) == 3
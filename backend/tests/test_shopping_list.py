@@ -0,0 +1,94 @@
+import pytest
+
+from core import shopping_list
+from recipes.models import Cart, IngredientRecipe, ShoppingListItem
+from tests.utils import assert_consistent, get_actual, get_expected
+
+
+def cart_url(recipe):
+    return f'/api/recipes/{recipe.pk}/shopping_cart/'
+
+
+@pytest.fixture
+def carts(users, recipes):
+    for user in users:
+        for recipe in recipes[:2]:
+            Cart.objects.create(user=user, recipe=recipe)
+    return users
+
+
+def test_cart_add_and_remove(user, user_client, recipes):
+    for recipe in recipes:
+        assert user_client.post(cart_url(recipe)).status_code == 201
+        assert_consistent(user)
+    assert get_actual(user)
+    for recipe in recipes:
+        assert user_client.delete(cart_url(recipe)).status_code == 204
+        assert_consistent(user)
+    assert not ShoppingListItem.objects.filter(user=user).exists()
+
+
+@pytest.mark.parametrize('changes', [
+    {'add': 1},
+    {'change': 5},
+    {'remove': 1},
+    {'add': 1, 'change': 3, 'remove': 1},
+])
+def test_recipe_ingredients_update(carts, author_client, recipe, ingredients,
+                                   tags, changes):
+    items = list(IngredientRecipe.objects.filter(recipe=recipe))
+    used = {item.ingredient_id for item in items}
+    payload = [
+        {'id': item.ingredient_id, 'amount': item.amount} for item in items
+    ]
+    if 'change' in changes:
+        payload[0]['amount'] += changes['change']
+    if 'remove' in changes:
+        payload = payload[:-changes['remove']]
+    if 'add' in changes:
+        free = [item for item in ingredients if item.pk not in used]
+        payload += [
+            {'id': ingredient.pk, 'amount': 7}
+            for ingredient in free[:changes['add']]
+        ]
+    response = author_client.patch(
+        f'/api/recipes/{recipe.pk}/',
+        {'ingredients': payload, 'tags': [tag.pk for tag in tags]},
+        format='json',
+    )
+    assert response.status_code == 200, response.json()
+    assert sorted(
+        IngredientRecipe.objects.filter(recipe=recipe).values_list(
+            'ingredient_id', 'amount'
+        )
+    ) == sorted((item['id'], item['amount']) for item in payload)
+    assert_consistent(*carts)
+
+
+def test_recipe_delete(carts, author_client, recipe):
+    response = author_client.delete(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 204
+    assert_consistent(*carts)
+
+
+def test_ingredient_row_changes(carts, recipe, ingredients):
+    item = IngredientRecipe.objects.filter(recipe=recipe).first()
+    item.amount += 4
+    item.save()
+    assert_consistent(*carts)
+    item.ingredient = ingredients[-1]
+    item.save()
+    assert_consistent(*carts)
+    item.delete()
+    assert_consistent(*carts)
+
+
+def test_rebuild(carts):
+    user, other = carts[:2]
+    ShoppingListItem.objects.update(amount=1)
+    shopping_list.rebuild([user.pk])
+    assert_consistent(user)
+    assert get_actual(other) != get_expected(other)
+    ShoppingListItem.objects.all().delete()
+    shopping_list.rebuild()
+    assert_consistent(*carts)
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from recipes.models import Cart
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+@pytest.fixture
+def cart(user, recipes):
+    for recipe in recipes:
+        Cart.objects.create(user=user, recipe=recipe)
+
+
+def get_content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def test_pdf_is_default(user_client, cart):
+    for headers in ({}, {'HTTP_ACCEPT': 'application/json'}):
+        response = user_client.get(URL, **headers)
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/pdf'
+        assert response.content.startswith(b'%PDF')
+
+
+@pytest.mark.parametrize('export_format, content_type', [
+    ('txt', 'text/plain; charset=utf-8'),
+    ('csv', 'text/csv; charset=utf-8'),
+    ('json', 'application/json'),
+])
+def test_streamed_formats(user_client, cart, export_format, content_type):
+    response = user_client.get(
+        URL, {'format': export_format}, HTTP_ACCEPT='application/pdf'
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == content_type
+    assert export_format in response['Content-Disposition']
+    content = get_content(response)
+    if export_format == 'json':
+        assert len(json.loads(content)) == 4
+    else:
+        assert 'Ингредиент 0' in content
+
+
+@pytest.mark.parametrize('export_format', ['pdf', 'txt', 'csv', 'json'])
+def test_unauthorized_error_is_json(anonymous_client, export_format):
+    response = anonymous_client.get(
+        URL, {'format': export_format}, HTTP_ACCEPT='application/pdf'
+    )
+    assert response.status_code == 401
+    assert response['Content-Type'] == 'application/json'
+    assert 'detail' in response.json()
+
+
+def test_unknown_format_is_rejected(user_client):
+    response = user_client.get(URL, {'format': 'xml'})
+    assert response.status_code == 400
+    assert response['Content-Type'] == 'application/json'
+    assert 'format' in response.json()
@@ -0,0 +1,37 @@
+from django.db.models import Sum
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import IngredientRecipe, ShoppingListItem
+
+
+def get_expected(user):
+    """Суммы ингредиентов рецептов из корзины пользователя."""
+    return dict(
+        IngredientRecipe.objects.filter(
+            recipe__in_carts__user=user
+        ).values('ingredient_id').annotate(
+            total=Sum('amount')
+        ).order_by().values_list('ingredient_id', 'total')
+    )
+
+
+def get_actual(user):
+    return dict(
+        ShoppingListItem.objects.filter(user=user).values_list(
+            'ingredient_id', 'amount'
+        )
+    )
+
+
+def assert_consistent(*users):
+    for user in users:
+        assert get_actual(user) == get_expected(user)
+
+
+def get_client(user=None):
+    client = APIClient()
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from core.paginators import EstimatedCountPaginator
 from users.models import User
 
 
@@ -9,9 +11,13 @@ class UserAdmin(admin.ModelAdmin):
     list_display = (
         'email',
         'username',
+        'recipes_count',
+        'followers_count',
     )
     search_fields = (
         'email',
         'username',
     )
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
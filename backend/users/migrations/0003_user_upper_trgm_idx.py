@@ -0,0 +1,25 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.db.operations import RunPostgresSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_follow_counters'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        RunPostgresSQL(
+            'CREATE INDEX IF NOT EXISTS user_username_upper_trgm_idx '
+            'ON users_user USING gin (UPPER(username) gin_trgm_ops)',
+            'DROP INDEX IF EXISTS user_username_upper_trgm_idx',
+        ),
+        RunPostgresSQL(
+            'CREATE INDEX IF NOT EXISTS user_email_upper_trgm_idx '
+            'ON users_user USING gin (UPPER(email) gin_trgm_ops)',
+            'DROP INDEX IF EXISTS user_email_upper_trgm_idx',
+        ),
+    ]
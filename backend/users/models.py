@@ -3,13 +3,14 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import ASCIIUsernameValidator
 from django.db import models
 
+from core.mixins import CounterFieldsMixin
 from core.user_validation import check_username
 
 
 USER_HELP_TEXT_TEMPLATE = 'Обязательно для заполнения, не более {} символов.'
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Модель пользователя."""
 
     username_validator = ASCIIUsernameValidator()
@@ -59,12 +60,25 @@ class User(AbstractUser):
         blank=False,
     )
 
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+
     USERNAME_FIELD = 'email'
 
     REQUIRED_FIELDS = [
         'username', 'first_name', 'last_name', 'password'
     ]
 
+    COUNTER_FIELDS = ('recipes_count', 'followers_count')
+
     def clean(self):
         super().clean()
         check_username(value=self.username)
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.counters import change_counter
+from core.token_cache import invalidate_tokens
+from users.models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+def follow_added(instance, created, **kwargs):
+    """Увеличивает счётчик подписчиков автора."""
+    if created:
+        change_counter('followers', instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(instance, **kwargs):
+    """Уменьшает счётчик подписчиков автора."""
+    change_counter('followers', instance.author_id, -1)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    """Удаляет токен из кеша аутентификации, например при выходе."""
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def user_saved(instance, created, update_fields=None, **kwargs):
+    """Удаляет из кеша аутентификации токены изменённого пользователя.
+
+    Сохранение только времени входа пропускается: оно не влияет
+    на права и выполняется при каждом входе.
+    """
+    if created or update_fields == frozenset(['last_login']):
+        return
+    invalidate_tokens(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )